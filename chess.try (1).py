@@ -1,16 +1,11 @@
+import os
 import pygame
 import sys
 import chess
-import chess.polyglot
-import os
-import random
 import time
-import threading
-from collections import defaultdict
-
+from collections import deque
 
-pygame.init()
-pygame.font.init()
+from chess_ai import DIFFICULTY_DEPTHS, EngineWorker, PurePythonAI
 
 
 SCREEN_WIDTH, SCREEN_HEIGHT = 1200, 850
@@ -48,14 +43,7 @@ def get_font(size, bold=False):
         return pygame.font.Font(None, size)
 
 
-FONTS = {
-    'TITLE': get_font(64, True),
-    'HEADER': get_font(36, True),
-    'BUTTON': get_font(28),
-    'INFO': get_font(24),
-    'SMALL': get_font(20),
-    'PIECE': get_font(48)
-}
+FONTS = {}
 
 
 PIECE_SYMBOLS = {
@@ -63,10 +51,24 @@ PIECE_SYMBOLS = {
     'R': '♖', 'N': '♘', 'B': '♗', 'Q': '♕', 'K': '♔', 'P': '♙'
 }
 
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("♔ Шахматы Python AI ♚")
+screen = None
 clock = pygame.time.Clock()
 
+# Неизменные слои и атлас фигур рисуются один раз в build_static_layers()
+LAYERS = {}
+PIECE_ATLAS = {}
+BOARD_RECT = pygame.Rect(MARGIN, MARGIN + 50, BOARD_SIZE, BOARD_SIZE)
+PANEL_RECT = pygame.Rect(BOARD_SIZE + MARGIN * 2, MARGIN,
+                         SCREEN_WIDTH - BOARD_SIZE - MARGIN * 3, SCREEN_HEIGHT - MARGIN * 2)
+SCREEN_RECT = pygame.Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT)
+frame_keys = {}
+
+# Полная частота кадров только во время анимации; в покое цикл ждёт событий
+ACTIVE_FPS = 60
+IDLE_TIMEOUT_MS = 1000
+# Поток движка будит главный цикл этим событием, когда результат готов
+ENGINE_EVENT = pygame.USEREVENT + 1
+
 
 board = chess.Board()
 selected_square = None
@@ -81,180 +83,12 @@ think_start_time = 0
 progress_value = 0
 status_message = "Готов к игре!"
 status_color = COLORS['SUCCESS']
-thinking_depth = 0
 ai_move_history = []
+ponder_enabled = True
 
 
-class PurePythonAI:
-    """Чисто Python шахматный ИИ без внешних зависимостей"""
-
-    def __init__(self):
-        self.initialized = True
-        self.piece_values = {
-            chess.PAWN: 100,
-            chess.KNIGHT: 320,
-            chess.BISHOP: 330,
-            chess.ROOK: 500,
-            chess.QUEEN: 900,
-            chess.KING: 20000
-        }
-        self.opening_book = self.create_opening_book()
-        self.move_cache = {}
-        print("✅ Python Chess AI инициализирован")
-
-    def create_opening_book(self):
-        """Создаёт встроенную базу дебютов"""
-        return {
-
-            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -": ["e2e4", "d2d4", "g1f3", "c2c4"],
-            "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3": ["e7e5", "c7c5", "e7e6", "c7c6"],
-            "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6": ["g1f3", "b1c3", "f1c4"],
-            "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6": ["g1f3", "d2d4", "b1c3"],
-        }
-
-    def evaluate_position(self, board_state):
-        """Оценка позиции"""
-        score = 0
-
-
-        for square in chess.SQUARES:
-            piece = board_state.piece_at(square)
-            if piece:
-                value = self.piece_values[piece.piece_type]
-                if piece.color == chess.WHITE:
-                    score += value
-                else:
-                    score -= value
-
-
-        center_squares = [chess.E4, chess.D4, chess.E5, chess.D5]
-        for move in board_state.legal_moves:
-            if move.to_square in center_squares:
-                if board_state.turn == chess.WHITE:
-                    score += 10
-                else:
-                    score -= 10
-
-
-        if board_state.is_check():
-            if board_state.turn == chess.WHITE:
-                score -= 50
-            else:
-                score += 50
-
-
-        mobility = len(list(board_state.legal_moves))
-        if board_state.turn == chess.WHITE:
-            score += mobility * 2
-        else:
-            score -= mobility * 2
-
-
-        return score if board_state.turn == chess.WHITE else -score
-
-    def minimax(self, board_state, depth, alpha, beta, maximizing_player):
-        """Алгоритм минимакс с альфа-бета отсечением"""
-        if depth == 0 or board_state.is_game_over():
-            return self.evaluate_position(board_state), None
-
-        best_move = None
-        legal_moves_list = list(board_state.legal_moves)
-
-        if maximizing_player:
-            max_eval = -float('inf')
-            for move in legal_moves_list:
-                board_state.push(move)
-                eval_score, _ = self.minimax(board_state, depth - 1, alpha, beta, False)
-                board_state.pop()
-
-                if eval_score > max_eval:
-                    max_eval = eval_score
-                    best_move = move
-
-                alpha = max(alpha, eval_score)
-                if beta <= alpha:
-                    break
-            return max_eval, best_move
-        else:
-            min_eval = float('inf')
-            for move in legal_moves_list:
-                board_state.push(move)
-                eval_score, _ = self.minimax(board_state, depth - 1, alpha, beta, True)
-                board_state.pop()
-
-                if eval_score < min_eval:
-                    min_eval = eval_score
-                    best_move = move
-
-                beta = min(beta, eval_score)
-                if beta <= alpha:
-                    break
-            return min_eval, best_move
-
-    def get_best_move(self, board_state, difficulty_level):
-        """Получение лучшего хода"""
-        global thinking_depth
-
-
-        fen_key = board_state.fen().split(' ')[0]
-        if fen_key in self.opening_book:
-            for move_uci in self.opening_book[fen_key]:
-                try:
-                    from_square = chess.parse_square(move_uci[:2])
-                    to_square = chess.parse_square(move_uci[2:4])
-                    if len(move_uci) == 5:
-                        promotion = {"q": chess.QUEEN, "r": chess.ROOK,
-                                     "b": chess.BISHOP, "n": chess.KNIGHT}[move_uci[4]]
-                        move = chess.Move(from_square, to_square, promotion=promotion)
-                    else:
-                        move = chess.Move(from_square, to_square)
-
-                    if move in board_state.legal_moves:
-                        print(f"📚 Ход из базы дебютов: {move_uci}")
-                        return move
-                except Exception as e:
-                    continue
-
-
-        if difficulty_level == 1:
-            thinking_depth = 2
-            depth = 2
-        elif difficulty_level == 2:
-            thinking_depth = 3
-            depth = 3
-        elif difficulty_level == 3:
-            thinking_depth = 4
-            depth = 4
-        else:  # Эксперт
-            thinking_depth = 5
-            depth = 5
-
-
-        try:
-            _, best_move = self.minimax(board_state, depth, -float('inf'), float('inf'),
-                                        board_state.turn == chess.WHITE)
-        except Exception as e:
-            print(f"Ошибка в минимаксе: {e}")
-            best_move = None
-
-        if best_move is None or best_move not in board_state.legal_moves:
-
-            legal_moves_list = list(board_state.legal_moves)
-            if legal_moves_list:
-
-                for move in legal_moves_list:
-                    if board_state.gives_check(move):
-                        return move
-                for move in legal_moves_list:
-                    if board_state.is_capture(move):
-                        return move
-                return random.choice(legal_moves_list)
-
-        return best_move
-
-
-
-ai_engine = PurePythonAI()
+ai_engine = None
+engine_worker = None
 
 
 class Button:
@@ -301,7 +135,7 @@ class Button:
 
 
 class ProgressIndicator:
-    """Анимированный индикатор прогресса"""
+    """Индикатор прогресса поиска: доля выполненной работы по оценке движка"""
 
     def __init__(self, x, y, width, height):
         self.rect = pygame.Rect(x, y, width, height)
@@ -309,9 +143,9 @@ class ProgressIndicator:
         self.pulse = 0
         self.pulse_dir = 1
 
-    def update(self, thinking, think_time=0):
+    def update(self, thinking, progress=0.0):
         if thinking:
-            self.value = (self.value + 3) % 100
+            self.value = int(progress * 100)
             self.pulse = (self.pulse + self.pulse_dir * 5) % 100
             if self.pulse >= 100:
                 self.pulse_dir = -1
@@ -321,7 +155,7 @@ class ProgressIndicator:
             self.value = 0
             self.pulse = 0
 
-    def draw(self, surface, thinking=False, depth=0):
+    def draw(self, surface, thinking=False, depth=0, target_depth=0, nodes=0):
 
         pygame.draw.rect(surface, (40, 50, 70), self.rect, border_radius=8)
 
@@ -338,8 +172,8 @@ class ProgressIndicator:
             pygame.draw.rect(surface, pulse_color, bar_rect, border_radius=8)
 
 
-            status = FONTS['INFO'].render(f"AI анализирует (глубина {depth})...",
-                                          True, COLORS['TEXT'])
+            status = FONTS['INFO'].render(f"AI анализирует: глубина {depth}/{target_depth}, "
+                                          f"{nodes} узлов", True, COLORS['TEXT'])
             surface.blit(status, (self.rect.x, self.rect.y - 35))
 
 
@@ -347,6 +181,114 @@ class ProgressIndicator:
 
 
 
+class FrameStats:
+    """Время работы кадров (без ожидания событий) за последние window кадров"""
+
+    def __init__(self, window=240):
+        self.times = deque(maxlen=window)
+        self.frames = 0
+        self.active_frames = 0
+        self.idle_frames = 0
+
+    def record(self, seconds, active):
+        self.times.append(seconds)
+        self.frames += 1
+        if active:
+            self.active_frames += 1
+        else:
+            self.idle_frames += 1
+
+    @property
+    def average_ms(self):
+        return 1000 * sum(self.times) / len(self.times) if self.times else 0.0
+
+    @property
+    def max_ms(self):
+        return 1000 * max(self.times) if self.times else 0.0
+
+    def summary(self):
+        return (f"Кадров: {self.frames} (анимация {self.active_frames}, по событию {self.idle_frames}), "
+                f"среднее {self.average_ms:.2f} мс, максимум {self.max_ms:.2f} мс")
+
+
+class MoveHistory:
+    """Список ходов партии
+
+    SAN вычисляется один раз при ходе, в позиции перед ним, а отрисованные
+    строки кэшируются. В кадре рисуются только видимые строки, поэтому
+    стоимость не зависит от длины партии. Список прокручивается колесом мыши
+    и следует за последним ходом, пока его не прокрутили вверх.
+    """
+
+    ROW_HEIGHT = 28
+    COLUMNS = (0, 50, 150)
+
+    def __init__(self):
+        self.sans = []
+        self.scroll = 0
+        self.follow = True
+        self.visible_rows = 1
+        self._rows = {}
+
+    def clear(self):
+        self.sans = []
+        self.scroll = 0
+        self.follow = True
+        self._rows.clear()
+
+    def push(self, board_state, move):
+        """Делает ход на доске и возвращает его SAN"""
+        san = board_state.san(move)
+        board_state.push(move)
+        self.sans.append(san)
+        return san
+
+    def pop(self, board_state):
+        board_state.pop()
+        if self.sans:
+            self.sans.pop()
+
+    @property
+    def row_count(self):
+        return (len(self.sans) + 1) // 2
+
+    def row_cells(self, row):
+        return (f"{row + 1}.",) + tuple(self.sans[2 * row:2 * row + 2])
+
+    def row_surface(self, row):
+        cells = self.row_cells(row)
+        cached = self._rows.get(row)
+        if cached is None or cached[0] != cells:
+            surface = pygame.Surface((self.COLUMNS[-1] + 100, self.ROW_HEIGHT), pygame.SRCALPHA)
+            for x, text in zip(self.COLUMNS, cells):
+                surface.blit(FONTS['SMALL'].render(text, True, COLORS['TEXT']), (x, 0))
+            cached = (cells, surface.convert_alpha())
+            self._rows[row] = cached
+        return cached[1]
+
+    def scroll_by(self, rows):
+        last = max(0, self.row_count - self.visible_rows)
+        self.scroll = min(max(self.scroll + rows, 0), last)
+        self.follow = self.scroll == last
+
+    def draw(self, surface, x, y, width, visible_rows):
+        self.visible_rows = visible_rows
+        last = max(0, self.row_count - visible_rows)
+        if self.follow or self.scroll > last:
+            self.scroll = last
+
+        for i, row in enumerate(range(self.scroll, min(self.scroll + visible_rows, self.row_count))):
+            surface.blit(self.row_surface(row), (x, y + i * self.ROW_HEIGHT))
+
+        if self.row_count > visible_rows:
+            track = pygame.Rect(x + width - 6, y, 6, visible_rows * self.ROW_HEIGHT)
+            thumb_height = max(track.height * visible_rows // self.row_count, 12)
+            thumb_y = track.y + (track.height - thumb_height) * self.scroll // last
+            pygame.draw.rect(surface, (40, 50, 70), track, border_radius=3)
+            pygame.draw.rect(surface, COLORS['ACCENT'], (track.x, thumb_y, track.width, thumb_height),
+                             border_radius=3)
+
+
 def create_menu_buttons():
     button_width, button_height = 320, 70
     start_x = (SCREEN_WIDTH - button_width) // 2
@@ -388,55 +330,82 @@ settings_buttons = create_settings_buttons()
 
 
 progress_indicator = ProgressIndicator(BOARD_SIZE + MARGIN * 2, 220, 400, 25)
+frame_stats = FrameStats()
+move_history = MoveHistory()
 
 
-def draw_gradient_background():
+def build_static_layers():
+    """Рисует один раз градиентный фон, доску с координатами и атлас фигур с тенями
+
+    Вызывается после создания окна: convert() приводит поверхности к формату
+    экрана, и blit не преобразует пиксели в каждом кадре.
+    """
+    background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
     for y in range(SCREEN_HEIGHT):
         color = (
             COLORS['BACKGROUND'][0] + int(y * 0.02),
             COLORS['BACKGROUND'][1] + int(y * 0.01),
             COLORS['BACKGROUND'][2] + int(y * 0.03)
         )
-        pygame.draw.line(screen, color, (0, y), (SCREEN_WIDTH, y))
-
-
-def draw_board_with_coordinates():
-    """Рисует доску с координатами"""
+        pygame.draw.line(background, color, (0, y), (SCREEN_WIDTH, y))
+    LAYERS['BACKGROUND'] = background.convert()
 
+    board_surface = pygame.Surface((BOARD_SIZE, BOARD_SIZE))
     for row in range(8):
         for col in range(8):
-            x = col * SQUARE_SIZE + MARGIN
-            y = row * SQUARE_SIZE + MARGIN + 50
+            x = col * SQUARE_SIZE
+            y = row * SQUARE_SIZE
 
             color = COLORS['BOARD_LIGHT'] if (row + col) % 2 == 0 else COLORS['BOARD_DARK']
-            pygame.draw.rect(screen, color, (x, y, SQUARE_SIZE, SQUARE_SIZE))
+            pygame.draw.rect(board_surface, color, (x, y, SQUARE_SIZE, SQUARE_SIZE))
 
- 
             if col == 0:
                 num = str(8 - row)
                 coord = FONTS['SMALL'].render(num, True,
                                               COLORS['TEXT'] if row % 2 == 1 else COLORS['BOARD_DARK'])
-                screen.blit(coord, (x + 5, y + 5))
+                board_surface.blit(coord, (x + 5, y + 5))
 
             if row == 7:
                 letter = chr(97 + col)
                 coord = FONTS['SMALL'].render(letter, True,
                                               COLORS['TEXT'] if col % 2 == 0 else COLORS['BOARD_LIGHT'])
-                screen.blit(coord, (x + SQUARE_SIZE - 18, y + SQUARE_SIZE - 22))
+                board_surface.blit(coord, (x + SQUARE_SIZE - 18, y + SQUARE_SIZE - 22))
+    LAYERS['BOARD'] = board_surface.convert()
 
+    last_move_surface = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+    last_move_surface.fill(COLORS['LAST_MOVE'])
+    LAYERS['LAST_MOVE'] = last_move_surface.convert_alpha()
 
-    if last_move:
-        from_row = 7 - chess.square_rank(last_move.from_square)
-        from_col = chess.square_file(last_move.from_square)
-        to_row = 7 - chess.square_rank(last_move.to_square)
-        to_col = chess.square_file(last_move.to_square)
+    center = (SQUARE_SIZE // 2, SQUARE_SIZE // 2)
+    for symbol, emoji in PIECE_SYMBOLS.items():
+        tile = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+
+        shadow = FONTS['PIECE'].render(emoji, True, (0, 0, 0, 180))
+        tile.blit(shadow, shadow.get_rect(center=(center[0] + 2, center[1] + 2)))
+
+        color = COLORS['TEXT'] if symbol.isupper() else (20, 20, 20)
+        glyph = FONTS['PIECE'].render(emoji, True, color)
+        tile.blit(glyph, glyph.get_rect(center=center))
+        PIECE_ATLAS[symbol] = tile.convert_alpha()
 
-        for row, col in [(from_row, from_col), (to_row, to_col)]:
-            x = col * SQUARE_SIZE + MARGIN
-            y = row * SQUARE_SIZE + MARGIN + 50
-            s = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
-            s.fill(COLORS['LAST_MOVE'])
-            screen.blit(s, (x, y))
+
+def square_origin(square):
+    """Левый верхний угол клетки на экране"""
+    return (chess.square_file(square) * SQUARE_SIZE + MARGIN,
+            (7 - chess.square_rank(square)) * SQUARE_SIZE + MARGIN + 50)
+
+
+def draw_gradient_background():
+    screen.blit(LAYERS['BACKGROUND'], (0, 0))
+
+
+def draw_board_with_coordinates():
+    """Рисует доску с координатами"""
+    screen.blit(LAYERS['BOARD'], BOARD_RECT.topleft)
+
+    if last_move:
+        for square in (last_move.from_square, last_move.to_square):
+            screen.blit(LAYERS['LAST_MOVE'], square_origin(square))
 
 
     if selected_square is not None:
@@ -448,29 +417,9 @@ def draw_board_with_coordinates():
 
 
 def draw_pieces_with_shadow():
-    """Рисует фигуры с тенями для лучшей видимости"""
-    for row in range(8):
-        for col in range(8):
-            square_idx = chess.square(col, 7 - row)
-            piece = board.piece_at(square_idx)
-
-            if piece:
-                symbol = piece.symbol()
-                if symbol in PIECE_SYMBOLS:
-                    emoji = PIECE_SYMBOLS[symbol]
-                    x = col * SQUARE_SIZE + MARGIN + SQUARE_SIZE // 2
-                    y = row * SQUARE_SIZE + MARGIN + 50 + SQUARE_SIZE // 2
-
-
-                    shadow = FONTS['PIECE'].render(emoji, True, (0, 0, 0, 180))
-                    shadow_rect = shadow.get_rect(center=(x + 2, y + 2))
-                    screen.blit(shadow, shadow_rect)
-
-
-                    color = COLORS['TEXT'] if symbol.isupper() else (20, 20, 20)
-                    text = FONTS['PIECE'].render(emoji, True, color)
-                    text_rect = text.get_rect(center=(x, y))
-                    screen.blit(text, text_rect)
+    """Рисует фигуры с тенями из заранее подготовленного атласа"""
+    for square, piece in board.piece_map().items():
+        screen.blit(PIECE_ATLAS[piece.symbol()], square_origin(square))
 
 
 def draw_legal_moves_highlight():
@@ -493,18 +442,6 @@ def draw_legal_moves_highlight():
                                        (center_x, center_y), SQUARE_SIZE // 6)
 
 
-def safe_san(board_state, move):
-    """Безопасное получение SAN нотации с проверкой легальности"""
-    try:
-        if move in board_state.legal_moves:
-            return board_state.san(move)
-        else:
-
-            return chess.square_name(move.from_square) + chess.square_name(move.to_square)
-    except:
-        return chess.square_name(move.from_square) + chess.square_name(move.to_square)
-
-
 def draw_info_panel():
     """Правая панель с информацией"""
     panel_x = BOARD_SIZE + MARGIN * 2
@@ -574,47 +511,18 @@ def draw_info_panel():
     progress_indicator.rect.y = y_offset
     progress_indicator.rect.width = panel_width - 40
 
-    think_time = time.time() - think_start_time if is_thinking else 0
-    progress_indicator.update(is_thinking, think_time)
-    progress_indicator.draw(screen, is_thinking, thinking_depth)
+    progress_indicator.update(is_thinking, ai_engine.search_progress() if is_thinking else 0.0)
+    progress_indicator.draw(screen, is_thinking, ai_engine.current_depth, DIFFICULTY_DEPTHS[difficulty],
+                            ai_engine.nodes)
     y_offset += 80
 
 
-    moves_title = FONTS['INFO'].render("ПОСЛЕДНИЕ ХОДЫ:", True, COLORS['ACCENT'])
+    moves_title = FONTS['INFO'].render("ХОДЫ ПАРТИИ:", True, COLORS['ACCENT'])
     screen.blit(moves_title, (panel_x + 20, y_offset))
     y_offset += 35
 
 
-    moves = list(board.move_stack)
-    col1_x = panel_x + 25
-    col2_x = panel_x + panel_width // 2 + 10
-    max_rows = 8
-
-    for i in range(0, min(len(moves), max_rows * 2), 2):
-        move_num = i // 2 + 1
-        col = col1_x if (i // 2) % 2 == 0 else col2_x
-        row = ((i // 2) % max_rows) * 28
-
-        if i < len(moves):
-            try:
-                white_move = safe_san(board, moves[i])
-            except:
-                white_move = "??"
-
-            move_text = f"{move_num:2d}. {white_move:6s}"
-
-            if i + 1 < len(moves):
-                try:
-                    black_move = safe_san(board, moves[i + 1])
-                except:
-                    black_move = "??"
-                move_text += f"  {black_move:6s}"
-
-            move_surf = FONTS['SMALL'].render(move_text, True, COLORS['TEXT'])
-
-
-            if y_offset + row < SCREEN_HEIGHT - 100:
-                screen.blit(move_surf, (col, y_offset + row))
+    move_history.draw(screen, panel_x + 25, y_offset, panel_width - 50, move_list_rows(y_offset))
 
 
     for btn in game_buttons:
@@ -626,6 +534,11 @@ def draw_info_panel():
         screen.blit(status_surf, (panel_x + 20, SCREEN_HEIGHT - MARGIN - 35))
 
 
+def move_list_rows(list_top):
+    """Сколько строк списка ходов помещается над кнопками панели"""
+    return max(1, (game_buttons[0].rect.y - 15 - list_top) // MoveHistory.ROW_HEIGHT)
+
+
 def draw_menu_screen():
     """Главное меню"""
     draw_gradient_background()
@@ -718,12 +631,108 @@ def draw_game_over_screen():
                           SCREEN_HEIGHT // 2 + 40))
 
 
+def invalidate_frame():
+    """Следующий кадр будет нарисован и выведен целиком"""
+    frame_keys.clear()
+
+
+def render_frame():
+    """Перерисовывает только изменившиеся области; возвращает их для display.update
+
+    Для каждой области хранится ключ из всего, что на неё влияет. Пока ключ
+    не меняется, область не рисуется и не передаётся на экран.
+    """
+    scene = (current_state, game_over)
+    if frame_keys.get('SCENE') != scene:
+        frame_keys.clear()
+        frame_keys['SCENE'] = scene
+
+    if current_state == "PLAYING" and not game_over:
+        dirty = []
+        if 'BOARD' not in frame_keys:
+            screen.fill(COLORS['BACKGROUND'])
+            dirty.append(SCREEN_RECT)
+
+        board_key = (board.board_fen(), last_move, selected_square)
+        if frame_keys.get('BOARD') != board_key:
+            frame_keys['BOARD'] = board_key
+            draw_board_with_coordinates()
+            draw_legal_moves_highlight()
+            draw_pieces_with_shadow()
+            dirty.append(BOARD_RECT)
+
+        panel_key = (board.fen(), difficulty, status_message, status_color, move_history.scroll,
+                     tuple((btn.hovered, btn.animation) for btn in game_buttons))
+        # Индикатор прогресса анимируется в каждом кадре, пока ИИ думает
+        if is_thinking or frame_keys.get('PANEL') != panel_key:
+            frame_keys['PANEL'] = panel_key
+            screen.fill(COLORS['BACKGROUND'], PANEL_RECT)
+            draw_info_panel()
+            dirty.append(PANEL_RECT)
+        return dirty
+
+    buttons = menu_buttons if current_state == "MENU" else settings_buttons
+    key = (difficulty, status_message, tuple((btn.hovered, btn.animation) for btn in buttons))
+    if frame_keys.get('SCREEN') == key:
+        return []
+    frame_keys['SCREEN'] = key
+
+    screen.fill(COLORS['BACKGROUND'])
+    if current_state == "MENU":
+        draw_menu_screen()
+    elif current_state == "PLAYING":
+        # Затемнение поверх позиции рисуется один раз, иначе оно накапливается
+        draw_board_with_coordinates()
+        draw_pieces_with_shadow()
+        draw_info_panel()
+        draw_game_over_screen()
+    elif current_state == "SETTINGS":
+        draw_settings_screen()
+    return [SCREEN_RECT]
+
+
+def scene_animating():
+    """Идёт ли анимация: индикатор поиска или переход подсветки кнопок"""
+    if is_thinking:
+        return True
+    if current_state == "MENU":
+        buttons = menu_buttons
+    elif current_state == "SETTINGS":
+        buttons = settings_buttons
+    else:
+        buttons = game_buttons
+    return any(0 < btn.animation < 10 or btn.hovered != (btn.animation > 0) for btn in buttons)
+
+
+def wait_for_events(animating):
+    """События для очередного кадра
+
+    Во время анимации кадры идут с частотой ACTIVE_FPS. В статичной сцене
+    поток блокируется в pygame.event.wait и не конкурирует с потоком движка
+    за GIL, пока не придёт ввод, событие движка или тайм-аут.
+    """
+    if animating:
+        return pygame.event.get()
+    event = pygame.event.wait(IDLE_TIMEOUT_MS)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+
+def post_engine_event():
+    """Вызывается из потока движка; pygame.event.post потокобезопасен"""
+    if pygame.display.get_init():
+        pygame.event.post(pygame.event.Event(ENGINE_EVENT))
+
+
 def start_new_game(color):
     """Начинает новую игру"""
     global board, selected_square, legal_moves, last_move, game_over, player_color
     global status_message, status_color, ai_move_history
 
+    cancel_ai_move()
     board = chess.Board()
+    move_history.clear()
     selected_square = None
     legal_moves = []
     last_move = None
@@ -755,46 +764,54 @@ def make_ai_move():
     status_message = "🤖 Python AI анализирует позицию..."
     status_color = COLORS['ACCENT']
 
-    threading.Thread(target=_ai_move_thread, daemon=True).start()
+    engine_worker.submit(board, difficulty)
 
 
-def _ai_move_thread():
-    """Фоновый поток для хода ИИ"""
-    global is_thinking, status_message, status_color
+def cancel_ai_move():
+    """Отменяет поиск ИИ: его результат уже не будет применён"""
+    global is_thinking
 
-    try:
-        start_time = time.time()
-
-
-        board_copy = board.copy()
-        move = ai_engine.get_best_move(board_copy, difficulty)
-        think_time = time.time() - start_time
-
-        if move and move in board.legal_moves:
-            ai_engine.pending_move = move
-
-
-            try:
-                move_san = board.san(move)
-            except:
-                move_san = f"{chess.square_name(move.from_square)}-{chess.square_name(move.to_square)}"
+    if engine_worker is not None:
+        engine_worker.cancel()
+    is_thinking = False
 
-            status_message = f"✅ AI: {move_san} (за {think_time:.1f}с)"
-            status_color = COLORS['SUCCESS']
-            print(f"Python AI: {move_san} (за {think_time:.2f}с)")
 
+def apply_ai_result(result):
+    """Применяет результат поиска текущего поколения (в главном потоке)"""
+    global is_thinking, status_message, status_color, last_move, game_over
 
-            ai_move_history.append((move_san, think_time))
-        else:
-            status_message = "⚠ AI не смог найти легальный ход"
-            status_color = COLORS['ERROR']
+    is_thinking = False
+    move = result.move
 
-    except Exception as e:
-        print(f"Ошибка AI: {e}")
-        status_message = f"⚠ Ошибка AI: {str(e)[:50]}"
+    if result.error is not None:
+        print(f"Ошибка AI: {result.error}")
+        status_message = f"⚠ Ошибка AI: {str(result.error)[:50]}"
+        status_color = COLORS['ERROR']
+    elif move and move in board.legal_moves:
+        move_san = move_history.push(board, move)
+        last_move = move
+        game_over = board.is_game_over()
+
+        status_message = f"✅ AI: {move_san} (за {result.think_time:.1f}с)"
+        status_color = COLORS['SUCCESS']
+        print(f"Python AI: {move_san} (за {result.think_time:.2f}с)")
+        if result.stats is not None:
+            print(f"   {result.stats.summary()}")
+
+        ai_move_history.append((move_san, result.think_time))
+        start_pondering(result)
+    else:
+        status_message = "⚠ AI не смог найти легальный ход"
         status_color = COLORS['ERROR']
 
-    is_thinking = False
+
+def start_pondering(result):
+    """Пока игрок думает, ИИ ищет ответ на ожидаемый ход из главного варианта"""
+    pv = result.pv
+    if not ponder_enabled or game_over or len(pv) < 2 or pv[0] != result.move:
+        return
+    if pv[1] in board.legal_moves:
+        engine_worker.ponder(board, pv[1], difficulty)
 
 
 def handle_board_click(pos):
@@ -824,13 +841,16 @@ def handle_board_click(pos):
         for move in legal_moves:
             if move.from_square == selected_square and move.to_square == square_idx:
                 try:
-                    board.push(move)
+                    move_history.push(board, move)
                     last_move = move
                     selected_square = None
                     legal_moves = []
                     game_over = board.is_game_over()
 
-                    if not game_over and board.turn != player_color:
+                    if game_over:
+                        # Обдумывание ответа без ограничений иначе заняло бы ядро до новой партии
+                        cancel_ai_move()
+                    elif board.turn != player_color:
                         make_ai_move()
                     return
                 except Exception as e:
@@ -855,12 +875,37 @@ def handle_board_click(pos):
 
 
 
+def init_display():
+    """Инициализирует pygame, шрифты и окно (только для графического клиента)"""
+    global screen
+
+    pygame.init()
+    pygame.font.init()
+
+    FONTS.update({
+        'TITLE': get_font(64, True),
+        'HEADER': get_font(36, True),
+        'BUTTON': get_font(28),
+        'INFO': get_font(24),
+        'SMALL': get_font(20),
+        'PIECE': get_font(48)
+    })
+
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("♔ Шахматы Python AI ♚")
+    build_static_layers()
+
+
 def main():
-    global current_state, difficulty, game_over, player_color, is_thinking
-    global status_message, status_color
+    global current_state, difficulty, game_over, player_color
+    global status_message, status_color, ai_engine, engine_worker, ponder_enabled
+    global selected_square, legal_moves, last_move
 
+    init_display()
     running = True
-    ai_engine.pending_move = None
+    # Постоянный кеш ходов включается путём к файлу базы в CHESS_AI_CACHE
+    ai_engine = PurePythonAI(verbose=True, cache_path=os.environ.get("CHESS_AI_CACHE"))
+    engine_worker = EngineWorker(ai_engine, notify=post_engine_event)
 
     print("\n" + "=" * 60)
     print("ШАХМАТЫ PYTHON AI - ЗАПУСК")
@@ -870,6 +915,9 @@ def main():
     print("=" * 60)
 
     while running:
+        animating = scene_animating()
+        events = wait_for_events(animating)
+        frame_start = time.perf_counter()
         mouse_pos = pygame.mouse.get_pos()
 
 
@@ -883,10 +931,17 @@ def main():
             for btn in settings_buttons:
                 btn.check_hover(mouse_pos)
 
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
 
+            elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                invalidate_frame()
+
+            elif event.type == pygame.MOUSEWHEEL and current_state == "PLAYING":
+                if PANEL_RECT.collidepoint(mouse_pos):
+                    move_history.scroll_by(-event.y)
+
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                 if current_state == "MENU":
                     for btn in menu_buttons:
@@ -910,18 +965,19 @@ def main():
                             if "Новая" in btn.text:
                                 start_new_game(player_color)
                             elif "Меню" in btn.text:
+                                cancel_ai_move()
                                 current_state = "MENU"
                                 status_message = ""
                             elif "Отменить" in btn.text:
                                 if len(board.move_stack) > 0:
-                                    board.pop()
+                                    cancel_ai_move()
+                                    move_history.pop(board)
                                     if len(board.move_stack) > 0 and board.turn != player_color:
-                                        board.pop()
+                                        move_history.pop(board)
+                                    last_move = board.peek() if board.move_stack else None
                                     selected_square = None
                                     legal_moves = []
                                     game_over = False
-                                    is_thinking = False
-                                    ai_engine.pending_move = None
                                     status_message = "↩ Ход отменён"
                                     status_color = COLORS['ACCENT']
                             elif "Ход ИИ" in btn.text:
@@ -957,6 +1013,7 @@ def main():
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     if current_state == "PLAYING":
+                        cancel_ai_move()
                         current_state = "MENU"
                         status_message = ""
                     elif current_state == "SETTINGS":
@@ -966,47 +1023,29 @@ def main():
                         running = False
                 elif event.key == pygame.K_n and current_state == "PLAYING":
                     start_new_game(player_color)
+                elif event.key == pygame.K_p:
+                    ponder_enabled = not ponder_enabled
+                    if not ponder_enabled and not is_thinking:
+                        cancel_ai_move()
+                    status_message = f"Обдумывание в ход игрока: {'вкл' if ponder_enabled else 'выкл'}"
+                    status_color = COLORS['ACCENT']
 
 
-        if current_state == "PLAYING" and ai_engine.pending_move and not is_thinking:
-            try:
-                if ai_engine.pending_move in board.legal_moves:
-                    board.push(ai_engine.pending_move)
-                    last_move = ai_engine.pending_move
-                    game_over = board.is_game_over()
-                else:
-                    status_message = "⚠ AI предложил нелегальный ход"
-                    status_color = COLORS['ERROR']
-            except Exception as e:
-                status_message = f"⚠ Ошибка выполнения хода AI: {str(e)[:30]}"
-                status_color = COLORS['ERROR']
-
-            ai_engine.pending_move = None
-
-
-        screen.fill(COLORS['BACKGROUND'])
-
-        if current_state == "MENU":
-            draw_menu_screen()
-
-        elif current_state == "PLAYING":
-            draw_board_with_coordinates()
-            draw_legal_moves_highlight()
-            draw_pieces_with_shadow()
-            draw_info_panel()
-
-            if game_over:
-                draw_game_over_screen()
-
-        elif current_state == "SETTINGS":
-            draw_settings_screen()
+        result = engine_worker.poll()
+        if result is not None and current_state == "PLAYING":
+            apply_ai_result(result)
 
 
-        progress_indicator.update(is_thinking)
+        dirty_rects = render_frame()
 
-        pygame.display.flip()
-        clock.tick(60)
+        if dirty_rects:
+            pygame.display.update(dirty_rects)
+        frame_stats.record(time.perf_counter() - frame_start, animating)
+        clock.tick(ACTIVE_FPS)
 
+    print(frame_stats.summary())
+    engine_worker.close()
+    ai_engine.shutdown()
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,30 @@
+"""Шахматный движок PurePythonAI без зависимости от pygame
+
+Импорт пакета ничего не инициализирует: книги дебютов открываются при первом
+запросе, пул процессов - при первом параллельном поиске.
+"""
+
+from .book import PolyglotBook
+from .engine import DIFFICULTY_DEPTHS, MATE_SCORE, PurePythonAI, SearchTimeout
+from .evaluation import IncrementalEvaluator
+from .ordering import MoveOrderer
+from .stats import SearchStats
+from .transposition import TT_EXACT, TT_LOWER, TT_UPPER, TranspositionTable
+from .worker import EngineWorker, SearchResult
+
+__all__ = [
+    "DIFFICULTY_DEPTHS",
+    "MATE_SCORE",
+    "EngineWorker",
+    "IncrementalEvaluator",
+    "MoveOrderer",
+    "PolyglotBook",
+    "PurePythonAI",
+    "SearchResult",
+    "SearchStats",
+    "SearchTimeout",
+    "TranspositionTable",
+    "TT_EXACT",
+    "TT_LOWER",
+    "TT_UPPER",
+]
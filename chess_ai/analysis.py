@@ -0,0 +1,342 @@
+"""Потоковый анализ архивов партий и позиций
+
+Запуск:
+    python -m chess_ai.analysis games.pgn -o annotated.pgn --depth 4 --workers 4
+    python -m chess_ai.analysis positions.epd -o results.jsonl --movetime 500
+    python -m chess_ai.analysis games.pgn -o annotated.pgn --resume
+
+Вход читается по одной партии (PGN) или строке (EPD), позиции партий
+анализируются как отдельные задания, в работе одновременно не больше
+нескольких заданий на процесс, а результаты дописываются в выходной
+файл в порядке входа, поэтому память не зависит от размера архива. Каждый
+процесс держит свой движок, и его таблица транспозиций переходит от позиции
+к позиции. После прерывания анализ продолжается с контрольной точки.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+
+import chess
+import chess.pgn
+
+from .engine import MATE_BOUND, MATE_SCORE, engine_pool, init_process_engine, process_engine, process_state
+
+
+DEFAULT_ANALYSIS_DEPTH = 4
+CHECKPOINT_INTERVAL = 10
+IN_FLIGHT_PER_WORKER = 2
+OUTPUT_FORMATS = ("pgn", "jsonl", "epd")
+
+
+def read_items(path):
+    """Лениво читает вход: ("game", заголовки, FEN начала, [ходы UCI]) или ("epd", строка)"""
+    if path.lower().endswith(".pgn"):
+        with open(path, encoding="utf-8", errors="replace") as handle:
+            while True:
+                game = chess.pgn.read_game(handle)
+                if game is None:
+                    return
+                yield ("game", dict(game.headers), game.board().fen(),
+                       [move.uci() for move in game.mainline_moves()])
+    else:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield ("epd", line)
+
+
+def analyse_position(board_state):
+    """Анализ одной позиции движком процесса: словарь с ходом, оценкой и вариантом"""
+    engine = process_engine()
+    move = engine.get_best_move(board_state, 4, **process_state()["limits"])
+    stats = engine.stats
+    return {
+        "bestmove": move.uci() if move is not None else None,
+        "score": stats.score,
+        "depth": stats.depth,
+        "pv": [pv_move.uci() for pv_move in stats.pv],
+        "nodes": stats.nodes,
+        "time_ms": round(stats.time_ms, 1),
+        "source": stats.source,
+    }
+
+
+def analyse_game_position(start_fen, moves, move):
+    """Позиция партии после ходов moves; move - ход, сыгранный в ней (None у последней)
+
+    История ходов передаётся целиком: поиск учитывает повторения позиций.
+    """
+    board_state = chess.Board(start_fen)
+    for uci in moves:
+        board_state.push_uci(uci)
+    result = analyse_position(board_state)
+    result["move"] = move
+    return result
+
+
+def analyse_epd_position(fen, epd_id):
+    return {"fen": fen, "id": epd_id, **analyse_position(chess.Board(fen))}
+
+
+def item_jobs(item):
+    """Задания пула для элемента входа: [(функция, аргументы), ...]
+
+    Партия разбивается на отдельные позиции: каждая позиция перед ходом и
+    последняя позиция, если партия в ней не закончена. Так даже одну длинную
+    партию анализируют все процессы.
+    """
+    if item[0] == "epd":
+        board_state, operations = chess.Board.from_epd(item[1])
+        return [(analyse_epd_position, (board_state.fen(), operations.get("id")))]
+
+    _, headers, start_fen, moves = item
+    board_state = chess.Board(start_fen)
+    jobs = []
+    for index, uci in enumerate(moves + [None]):
+        if board_state.is_game_over():
+            break
+        jobs.append((analyse_game_position, (start_fen, moves[:index], uci)))
+        if uci is not None:
+            board_state.push_uci(uci)
+    return jobs
+
+
+def assemble_item(item, results):
+    """Результат элемента входа из результатов его заданий"""
+    if item[0] == "epd":
+        return results[0]
+    _, headers, start_fen, _ = item
+    return {"headers": headers, "fen": start_fen, "positions": results}
+
+
+def format_score(score, white_to_move):
+    """Оценка для PGN с точки зрения белых: +0.35 или #3 / #-2"""
+    if not white_to_move:
+        score = -score
+    if score >= MATE_BOUND:
+        return f"#{(MATE_SCORE - score + 1) // 2}"
+    if score <= -MATE_BOUND:
+        return f"#-{(MATE_SCORE + score) // 2}"
+    return f"{score / 100:+.2f}"
+
+
+def annotated_pgn(result):
+    """Партия с оценкой [%eval] после каждого хода и лучшим вариантом движка там,
+    где сыгран другой ход"""
+    game = chess.pgn.Game()
+    game.headers.update(result["headers"])
+    game.setup(chess.Board(result["fen"]))
+    game.headers["Annotator"] = "PurePythonAI"
+    board_state = chess.Board(result["fen"])
+    node = game
+    positions = result["positions"]
+    for index, position in enumerate(positions):
+        if position["move"] is None:
+            break
+        move = chess.Move.from_uci(position["move"])
+        if position["bestmove"] not in (None, position["move"]) and position["pv"]:
+            variation = node.add_variation(chess.Move.from_uci(position["pv"][0]))
+            for uci in position["pv"][1:]:
+                variation = variation.add_variation(chess.Move.from_uci(uci))
+        node = node.add_main_variation(move)
+        board_state.push(move)
+        if index + 1 < len(positions):
+            after = positions[index + 1]
+            node.comment = (f"[%eval {format_score(after['score'], board_state.turn == chess.WHITE)},"
+                            f"{after['depth']}]")
+    return str(game)
+
+
+def annotated_epd(result):
+    """Позиция EPD с кодами bm (лучший ход), ce (оценка), acd (глубина) и pv"""
+    board_state = chess.Board(result["fen"])
+    operations = {"acd": result["depth"], "ce": result["score"]}
+    if result["bestmove"] is not None:
+        operations["bm"] = chess.Move.from_uci(result["bestmove"])
+    if result["pv"]:
+        operations["pv"] = [chess.Move.from_uci(uci) for uci in result["pv"]]
+    if result["id"] is not None:
+        operations["id"] = result["id"]
+    return board_state.epd(**operations)
+
+
+def format_result(result, output_format):
+    if output_format == "jsonl":
+        return json.dumps(result, ensure_ascii=False)
+    if output_format == "pgn":
+        return annotated_pgn(result) + "\n"
+    return annotated_epd(result)
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, input_path, done, output_size):
+    """Атомарно записывает число готовых заданий и длину выходного файла"""
+    temporary = path + ".tmp"
+    with open(temporary, "w", encoding="utf-8") as handle:
+        json.dump({"input": os.path.abspath(input_path), "done": done, "output_size": output_size}, handle)
+    os.replace(temporary, path)
+
+
+def _results(items, engine_options, limits, workers, report=print):
+    """Результаты элементов входа в порядке входа; None - элемент пропущен
+
+    Задания - отдельные позиции; одновременно в работе не больше
+    IN_FLIGHT_PER_WORKER заданий на процесс. Некорректная строка EPD
+    пропускается с сообщением в report и не останавливает анализ архива.
+    """
+    def jobs_of(item):
+        try:
+            return item_jobs(item)
+        except ValueError as e:
+            report(f"Пропущена строка EPD: {item[1]} ({e})")
+            return None
+
+    state = {"limits": limits}
+    if workers <= 1:
+        init_process_engine(engine_options, state)
+        for item in items:
+            jobs = jobs_of(item)
+            yield None if jobs is None else assemble_item(item, [function(*args) for function, args in jobs])
+        return
+
+    from collections import deque
+
+    # Элементы входа в порядке чтения: [элемент, результаты заданий, число незавершённых]
+    entries = deque()
+    pending = deque()
+
+    def finished():
+        while entries and entries[0][2] == 0:
+            item, results, _ = entries.popleft()
+            yield None if results is None else assemble_item(item, results)
+
+    def collect():
+        entry, index, future = pending.popleft()
+        entry[1][index] = future.result()
+        entry[2] -= 1
+
+    with engine_pool(workers, engine_options, state) as executor:
+        try:
+            for item in items:
+                jobs = jobs_of(item)
+                entry = [item, None if jobs is None else [None] * len(jobs), len(jobs or ())]
+                entries.append(entry)
+                for index, (function, args) in enumerate(jobs or ()):
+                    pending.append((entry, index, executor.submit(function, *args)))
+                    if len(pending) >= IN_FLIGHT_PER_WORKER * workers:
+                        collect()
+                        yield from finished()
+                yield from finished()
+            while pending:
+                collect()
+                yield from finished()
+        finally:
+            for _, _, future in pending:
+                future.cancel()
+
+
+def run_analysis(input_path, output_path, limits, engine_options=None, workers=1, resume=False,
+                 checkpoint_path=None, checkpoint_interval=CHECKPOINT_INTERVAL, report=print):
+    """Анализирует вход и дописывает результаты в output_path; возвращает число готовых заданий
+
+    resume=True продолжает с контрольной точки: выходной файл обрезается до
+    записанной длины (последняя запись могла оборваться), а уже готовые
+    задания пропускаются без анализа. Существующий выходной файл без
+    контрольной точки не трогается ни в каком режиме.
+    """
+    output_format = output_path.rsplit(".", 1)[-1].lower()
+    if output_format == "json":
+        output_format = "jsonl"
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Неизвестный формат вывода: {output_path}")
+    pgn_input = input_path.lower().endswith(".pgn")
+    if (output_format == "pgn") != pgn_input and output_format != "jsonl":
+        raise ValueError("PGN можно записать только для партий, EPD - только для позиций")
+
+    engine_options = dict(engine_options or {}, use_book=False)
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+    done = 0
+    if resume:
+        checkpoint = load_checkpoint(checkpoint_path)
+        if checkpoint is not None:
+            if checkpoint["input"] != os.path.abspath(input_path):
+                raise ValueError(f"Контрольная точка относится к другому файлу: {checkpoint['input']}")
+            done = checkpoint["done"]
+            with open(output_path, "ab") as handle:
+                handle.truncate(checkpoint["output_size"])
+            report(f"Продолжение с задания {done + 1}")
+        elif os.path.exists(output_path):
+            # Без контрольной точки неизвестно, что в файле: он не перезаписывается
+            raise FileExistsError(f"{output_path} уже существует, а контрольной точки {checkpoint_path} нет")
+        else:
+            report("Контрольная точка не найдена, анализ с начала")
+    elif os.path.exists(output_path):
+        raise FileExistsError(f"{output_path} уже существует (используйте --resume)")
+
+    items = itertools.islice(read_items(input_path), done, None)
+    start_time = time.perf_counter()
+    positions = 0
+    with open(output_path, "a", encoding="utf-8") as output:
+        try:
+            for result in _results(items, engine_options, limits, workers, report):
+                done += 1
+                if result is not None:
+                    output.write(format_result(result, output_format) + "\n")
+                    positions += len(result["positions"]) if "positions" in result else 1
+                if done % checkpoint_interval == 0:
+                    output.flush()
+                    save_checkpoint(checkpoint_path, input_path, done, os.fstat(output.fileno()).st_size)
+                    elapsed = time.perf_counter() - start_time
+                    report(f"{done} готово, {positions} позиций, {positions / max(elapsed, 1e-6):.1f} поз/с")
+        except KeyboardInterrupt:
+            report(f"Анализ прерван после {done} заданий")
+        finally:
+            output.flush()
+            save_checkpoint(checkpoint_path, input_path, done, os.fstat(output.fileno()).st_size)
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Потоковый анализ PGN/EPD движком PurePythonAI")
+    parser.add_argument("input", help="партии в PGN или позиции в EPD")
+    parser.add_argument("-o", "--output", required=True, help="выходной файл: .pgn, .jsonl или .epd")
+    parser.add_argument("--depth", type=int, help=f"глубина (по умолчанию {DEFAULT_ANALYSIS_DEPTH})")
+    parser.add_argument("--movetime", type=int, help="время на позицию в мс")
+    parser.add_argument("--nodes", type=int, help="предел узлов на позицию")
+    parser.add_argument("--hash", type=int, default=64, help="размер TT каждого процесса в МБ")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--resume", action="store_true", help="продолжить с контрольной точки")
+    parser.add_argument("--checkpoint", help="файл контрольной точки (по умолчанию OUTPUT.checkpoint)")
+    parser.add_argument("--checkpoint-interval", type=int, default=CHECKPOINT_INTERVAL)
+    args = parser.parse_args(argv)
+
+    limits = {}
+    if args.movetime is not None:
+        limits["movetime_ms"] = args.movetime
+    if args.nodes is not None:
+        limits["nodes"] = args.nodes
+    if args.depth is not None or not limits:
+        limits["depth"] = args.depth or DEFAULT_ANALYSIS_DEPTH
+
+    start_time = time.perf_counter()
+    try:
+        done = run_analysis(args.input, args.output, limits, {"tt_size_mb": args.hash}, args.workers,
+                            args.resume, args.checkpoint, max(args.checkpoint_interval, 1))
+    except (ValueError, FileExistsError) as e:
+        parser.error(str(e))
+    print(f"Готово: {done} заданий за {time.perf_counter() - start_time:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
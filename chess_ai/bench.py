@@ -0,0 +1,165 @@
+"""Бенчмарк поиска на фиксированном наборе позиций
+
+Запуск: python -m chess_ai.bench [--depth N] [--algorithm pvs|minimax] [--json]
+
+Каждая позиция ищется на фиксированную глубину с очищенными таблицами и без
+книги дебютов, поэтому число узлов детерминировано: сигнатура меняется только
+при изменении самого поиска, оценки или порядка ходов, а не от скорости машины.
+"""
+
+import argparse
+import json
+import platform
+import sys
+import zlib
+
+import chess
+
+from .engine import DIFFICULTY_DEPTHS, SEARCH_ALGORITHMS, PurePythonAI
+
+
+DEFAULT_BENCH_DEPTH = 4
+BENCH_TT_SIZE_MB = 16
+
+# (имя, FEN, лучшие ходы в SAN для тестовых позиций Bratko-Kopec и WAC)
+BENCH_POSITIONS = [
+    ("startpos", chess.STARTING_FEN, ()),
+    ("ruy-lopez", "r1bqkbnr/pppp1ppp/2n5/1B2p3/4P3/5N2/PPPP1PPP/RNBQK2R b KQkq - 3 3", ()),
+    ("qgd", "rnbqkb1r/ppp2ppp/4pn2/3p4/2PP4/2N5/PP2PPPP/R1B1KBNR w KQkq - 2 4", ()),
+    ("najdorf", "rnbqkb1r/1p2pppp/p2p1n2/8/3NP3/2N5/PPP2PPP/R1BQKB1R w KQkq - 0 6", ()),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", ()),
+    ("bk.01", "1k1r4/pp1b1R2/3q2pp/4p3/2B5/4Q3/PPP2B2/2K5 b - - 0 1", ("Qd1+",)),
+    ("bk.02", "3r1k2/4npp1/1ppr3p/p6P/P2PPPP1/1NR5/5K2/2R5 w - - 0 1", ("d5",)),
+    ("bk.03", "2q1rr1k/3bbnnp/p2p1pp1/2pPp3/PpP1P1P1/1P2BNNP/2BQ1PRK/7R b - - 0 1", ("f5",)),
+    ("bk.04", "rnbqkb1r/p3pppp/1p6/2ppP3/3N4/2P5/PPP1QPPP/R1B1KB1R w KQkq - 0 1", ("e6",)),
+    ("bk.05", "r1b2rk1/2q1b1pp/p2ppn2/1p6/3QP3/1BN1B3/PPP3PP/R4RK1 w - - 0 1", ("Nd5", "a4")),
+    ("bk.06", "2r3k1/pppR1pp1/4p3/4P1P1/5P2/1P4K1/P1P5/8 w - - 0 1", ("g6",)),
+    ("wac.001", "2rr3k/pp3pp1/1nnqbN1p/3pN3/2pP4/2P3Q1/PPB4P/R4RK1 w - - 0 1", ("Qg6",)),
+    ("wac.002", "8/7p/5k2/5p2/p1p2P2/Pr1pPK2/1P1R3P/8 b - - 0 1", ("Rxb2",)),
+    ("wac.003", "5rk1/1ppb3p/p1pb4/6q1/3P1p1r/2P1R2P/PP1BQ1P1/5RKN w - - 0 1", ("Rg3",)),
+    ("lucena", "1K1k4/1P6/8/8/8/8/r7/2R5 w - - 0 1", ()),
+    ("kpk", "8/8/8/4k3/8/8/4P3/4K3 w - - 0 1", ()),
+    ("fine-70", "8/k7/3p4/p2P1p2/P2P1P2/8/8/K7 w - - 0 1", ()),
+    ("rook-ending", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", ()),
+]
+
+
+def bench_position(engine, fen, depth):
+    """Ищет одну позицию с чистыми таблицами; возвращает словарь с результатами"""
+    board = chess.Board(fen)
+    engine.tt.clear()
+    engine.move_orderer.clear()
+    engine.evaluator.pawn_table.clear()
+
+    move = engine.get_best_move(board, max(DIFFICULTY_DEPTHS), depth=depth)
+    stats = engine.stats
+
+    # Эффективный коэффициент ветвления: рост числа узлов на последней итерации
+    iterations = stats.iterations
+    ebf = 0.0
+    if len(iterations) >= 2 and iterations[-2]["nodes"]:
+        ebf = iterations[-1]["nodes"] / iterations[-2]["nodes"]
+    return {
+        "fen": fen,
+        "depth": depth,
+        "move": board.san(move) if move is not None else None,
+        "score": stats.score,
+        "nodes": stats.nodes,
+        "qnodes": stats.qnodes,
+        "time_ms": round(stats.time_ms, 1),
+        "nps": stats.nps,
+        "ebf": round(ebf, 2),
+        "tt_hit_rate": round(stats.tt_hit_rate, 4),
+        "pawn_hit_rate": round(stats.pawn_hit_rate, 4),
+        "cutoffs": stats.cutoffs,
+        "first_move_cutoff_rate": round(stats.first_move_cutoff_rate, 4),
+    }
+
+
+def node_signature(results):
+    """Контрольная сумма числа узлов по позициям; не зависит от скорости машины"""
+    data = ";".join(f"{result['fen']}:{result['nodes']}" for result in results)
+    return f"{zlib.crc32(data.encode()):08x}"
+
+
+def run_bench(depth=DEFAULT_BENCH_DEPTH, algorithm="pvs", positions=BENCH_POSITIONS,
+              tt_size_mb=BENCH_TT_SIZE_MB, progress=None):
+    """Прогоняет набор позиций; progress(index, name, result) вызывается после каждой"""
+    engine = PurePythonAI(tt_size_mb=tt_size_mb, search_algorithm=algorithm, use_book=False)
+    results = []
+    solved = tested = 0
+    for index, (name, fen, best_moves) in enumerate(positions, 1):
+        result = bench_position(engine, fen, depth)
+        result["name"] = name
+        if best_moves:
+            tested += 1
+            result["solved"] = result["move"] in best_moves
+            solved += result["solved"]
+        results.append(result)
+        if progress is not None:
+            progress(index, name, result)
+
+    nodes = sum(result["nodes"] for result in results)
+    time_ms = sum(result["time_ms"] for result in results)
+    return {
+        "depth": depth,
+        "algorithm": algorithm,
+        "python": platform.python_version(),
+        "chess": chess.__version__,
+        "positions": results,
+        "nodes": nodes,
+        "qnodes": sum(result["qnodes"] for result in results),
+        "time_ms": round(time_ms, 1),
+        "nps": int(nodes * 1000 / max(time_ms, 1e-3)),
+        "tt_hit_rate": round(sum(result["tt_hit_rate"] for result in results) / len(results), 4),
+        "pawn_hit_rate": round(sum(result["pawn_hit_rate"] for result in results) / len(results), 4),
+        "solved": f"{solved}/{tested}",
+        "signature": node_signature(results),
+    }
+
+
+def format_result(index, total, name, result):
+    line = (f"{index:2d}/{total} {name:12s} {result['move'] or '-':7s} nodes {result['nodes']:9d} "
+            f"time {result['time_ms'] / 1000:7.2f}s nps {result['nps']:7d} ebf {result['ebf']:5.2f} "
+            f"tt {result['tt_hit_rate']:6.1%}")
+    if "solved" in result:
+        line += " ✓" if result["solved"] else " ✗"
+    return line
+
+
+def format_summary(summary):
+    return [
+        f"Depth: {summary['depth']} ({summary['algorithm']})",
+        f"Total time (ms): {summary['time_ms']:.0f}",
+        f"Nodes searched: {summary['nodes']}",
+        f"Nodes/second: {summary['nps']}",
+        f"TT hit rate: {summary['tt_hit_rate']:.1%}",
+        f"Pawn hash hit rate: {summary['pawn_hit_rate']:.1%}",
+        f"Test positions solved: {summary['solved']}",
+        f"Signature: {summary['signature']}",
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска PurePythonAI")
+    parser.add_argument("--depth", type=int, default=DEFAULT_BENCH_DEPTH)
+    parser.add_argument("--algorithm", choices=SEARCH_ALGORITHMS, default="pvs")
+    parser.add_argument("--hash", type=int, default=BENCH_TT_SIZE_MB, help="размер TT в МБ")
+    parser.add_argument("--json", action="store_true", help="вывести результат в JSON")
+    args = parser.parse_args(argv)
+
+    def print_progress(index, name, result):
+        print(format_result(index, len(BENCH_POSITIONS), name, result), flush=True)
+
+    summary = run_bench(args.depth, args.algorithm, tt_size_mb=args.hash,
+                        progress=None if args.json else print_progress)
+    if args.json:
+        json.dump(summary, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print()
+        print("\n".join(format_summary(summary)))
+
+
+if __name__ == "__main__":
+    main()
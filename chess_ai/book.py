@@ -0,0 +1,54 @@
+"""Дебютные книги"""
+
+import functools
+import os
+import random
+import sys
+
+import chess.polyglot
+
+
+BOOK_MAX_PLY = 20
+
+
+class PolyglotBook:
+    """Дебютные книги Polyglot (.bin), отображаемые в память при первом запросе
+
+    Файлы не читаются целиком: MemoryMappedReader из chess.polyglot ищет записи
+    двоичным поиском по ключу Zobrist прямо в отображении файла. Книги
+    опрашиваются по порядку, первая с найденными ходами даёт ответ.
+    Предупреждения передаются в log (по умолчанию - в stderr).
+    """
+
+    def __init__(self, paths, weighted=True, rng=None, log=None):
+        self.paths = [paths] if isinstance(paths, (str, os.PathLike)) else list(paths)
+        self.weighted = weighted
+        self.random = rng or random.Random()
+        self.log = log or functools.partial(print, file=sys.stderr)
+        self._readers = None
+
+    def _open(self):
+        self._readers = []
+        for path in self.paths:
+            try:
+                self._readers.append(chess.polyglot.open_reader(path))
+            except OSError as e:
+                self.log(f"⚠ Не удалось открыть книгу дебютов {path}: {e}")
+        return self._readers
+
+    def find_move(self, board_state):
+        """Ход из книги для позиции или None"""
+        readers = self._readers if self._readers is not None else self._open()
+        for reader in readers:
+            entries = list(reader.find_all(board_state))
+            if not entries:
+                continue
+            if self.weighted:
+                return self.random.choices(entries, weights=[entry.weight for entry in entries])[0].move
+            return max(entries, key=lambda entry: entry.weight).move
+        return None
+
+    def close(self):
+        for reader in self._readers or []:
+            reader.close()
+        self._readers = None
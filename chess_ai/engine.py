@@ -0,0 +1,1142 @@
+"""Поиск лучшего хода: PurePythonAI"""
+
+import random
+import sys
+import threading
+import time
+
+import chess
+import chess.polyglot
+
+from .book import BOOK_MAX_PLY, PolyglotBook
+from .evaluation import IncrementalEvaluator
+from .ordering import MoveOrderer
+from .persistent import DEFAULT_MIN_DEPTH, PersistentCache
+from .stats import SearchStats, make_profiler
+from .tablebase import DEFAULT_PROBE_LIMIT, TABLEBASE_WIN_SCORE, SyzygyTablebase
+from .transposition import TT_EXACT, TT_LOWER, TT_UPPER, TranspositionTable
+
+
+DIFFICULTY_DEPTHS = {1: 2, 2: 3, 3: 4, 4: 5}
+MAX_SEARCH_DEPTH = 64
+TIME_CHECK_INTERVAL = 1024
+MATE_SCORE = 100000
+MATE_BOUND = MATE_SCORE - 1000
+SEARCH_ALGORITHMS = ("pvs", "minimax")
+NULL_MOVE_MIN_DEPTH = 3
+LMR_MIN_DEPTH = 3
+LMR_MIN_MOVE_INDEX = 3
+# Итерации мельче ищутся целиком в главном процессе: задачи пула дороже самого поиска
+PARALLEL_MIN_DEPTH = 4
+WORKER_START_TIMEOUT = 60
+DELTA_MARGIN = 200
+# Дальше от последнего взятия или хода пешкой ход из постоянного кеша не берётся:
+# кеш не знает счётчика 50 ходов партии
+CACHE_MAX_HALFMOVE_CLOCK = 50
+BB_BACKRANKS = chess.BB_RANK_1 | chess.BB_RANK_8
+
+
+class SearchTimeout(Exception):
+    """Поиск прерван: исчерпан бюджет времени или узлов, либо вызван stop()"""
+
+
+class PurePythonAI:
+    """Чисто Python шахматный ИИ без внешних зависимостей"""
+
+    def __init__(self, tt_size_mb=64, tt_policy="depth", quiescence=True,
+                 search_algorithm="pvs", workers=1, book_paths=None, book_max_ply=BOOK_MAX_PLY,
+                 book_weighted=True, use_book=True, pawn_hash_mb=1, syzygy_path=None,
+                 syzygy_probe_limit=DEFAULT_PROBE_LIMIT, cache_path=None, cache_min_depth=DEFAULT_MIN_DEPTH,
+                 verbose=False, log=None):
+        if search_algorithm not in SEARCH_ALGORITHMS:
+            raise ValueError(f"Неизвестный алгоритм поиска: {search_algorithm}")
+        if workers < 1:
+            raise ValueError("Число процессов поиска должно быть не меньше 1")
+        self.initialized = True
+        self.verbose = verbose
+        # Получатель предупреждений книг, таблиц и кеша; None - stderr
+        self.log = log
+        self.piece_values = {
+            chess.PAWN: 100,
+            chess.KNIGHT: 320,
+            chess.BISHOP: 330,
+            chess.ROOK: 500,
+            chess.QUEEN: 900,
+            chess.KING: 20000
+        }
+        self.opening_book = self.create_opening_book()
+        self.polyglot_book = PolyglotBook(book_paths, book_weighted, log=self._warn) if book_paths else None
+        self.book_max_ply = book_max_ply
+        self.use_book = use_book
+        self.evaluator = IncrementalEvaluator(self.piece_values, pawn_hash_mb)
+        self.move_orderer = MoveOrderer(self.piece_values)
+        self.tt = TranspositionTable(tt_size_mb, tt_policy)
+        self.use_quiescence = quiescence
+        self.search_algorithm = search_algorithm
+        self._tt_algorithm = search_algorithm
+        self.workers = workers
+        self._executor = None
+        self._shared_alpha = None
+        self._parallel_search_id = 0
+        self.nodes = 0
+        self.qnodes = 0
+        self.score = 0
+        self.current_depth = 0
+        self.pv = []
+        self._pv_hints = {}
+        self._deadline = None
+        self._node_limit = None
+        self._root_best_move = None
+        self._stop_event = None
+        self.stop_requested = False
+        self._max_depth = 0
+        self._time_budget = None
+        self._budget_start = 0.0
+        self._ponder_lock = threading.Lock()
+        self._ponder_wake = threading.Event()
+        self._ponder_limits = None
+        self._ponderhit = False
+        self.tablebase = None
+        self._tb_limit = 0
+        self.set_tablebase(syzygy_path, syzygy_probe_limit)
+        # Постоянный кеш корневых результатов; база открывается при первом поиске
+        self.persistent_cache = (PersistentCache(cache_path, min_depth=cache_min_depth, log=self._warn)
+                                 if cache_path else None)
+        self.stats = SearchStats()
+        self._log("✅ Python Chess AI инициализирован")
+
+    def _log(self, message):
+        if self.verbose:
+            print(message)
+
+    def _warn(self, message):
+        """Предупреждение не зависит от verbose, но идёт не в stdout: в режиме UCI
+        это канал протокола, и UCI передаёт такие сообщения как info string"""
+        if self.log is not None:
+            self.log(message)
+        else:
+            print(message, file=sys.stderr)
+
+    def create_opening_book(self):
+        """Создаёт встроенную базу дебютов, индексированную ключами Zobrist"""
+        positions = {
+
+            "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq -": ["e2e4", "d2d4", "g1f3", "c2c4"],
+            "rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3": ["e7e5", "c7c5", "e7e6", "c7c6"],
+            "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq e6": ["g1f3", "b1c3", "f1c4"],
+            "rnbqkbnr/pp1ppppp/8/2p5/4P3/8/PPPP1PPP/RNBQKBNR w KQkq c6": ["g1f3", "d2d4", "b1c3"],
+        }
+        return {chess.polyglot.zobrist_hash(chess.Board(fen + " 0 1")): moves
+                for fen, moves in positions.items()}
+
+    def book_move(self, board_state):
+        """Ход из книги Polyglot, а если она не задана - из встроенной базы"""
+        if board_state.ply() > self.book_max_ply:
+            return None
+
+        if self.polyglot_book is not None:
+            move = self.polyglot_book.find_move(board_state)
+            if move is not None and move in board_state.legal_moves:
+                return move
+            return None
+
+        for move_uci in self.opening_book.get(chess.polyglot.zobrist_hash(board_state), []):
+            move = chess.Move.from_uci(move_uci)
+            if move in board_state.legal_moves:
+                return move
+        return None
+
+    def set_tablebase(self, syzygy_path, probe_limit=DEFAULT_PROBE_LIMIT):
+        """Подключает таблицы Syzygy (каталоги через os.pathsep) или отключает их при пустом пути
+
+        Файлы открываются при первом поиске; пул процессов пересоздаётся,
+        чтобы исполнители получили новые настройки.
+        """
+        if self.tablebase is not None:
+            self.tablebase.close()
+        self.tablebase = SyzygyTablebase(syzygy_path, probe_limit, log=self._warn) if syzygy_path else None
+        self._tb_limit = 0
+        self._close_executor()
+
+    def _prepare_tablebase(self):
+        """Предел числа фигур для запросов в поиске; 0 - таблиц нет"""
+        self._tb_limit = self.tablebase.limit if self.tablebase is not None else 0
+
+    def _probe_tablebase(self, board_state, key, ply):
+        """Точная оценка по WDL для стороны на ходу или None
+
+        Запрос делается только сразу после обнуления счётчика 50 ходов:
+        WDL не учитывает счётчик, а все остальные позиции таблиц достижимы
+        из такой позиции или из корня, где ход выбирается по DTZ.
+        """
+        if (board_state.halfmove_clock or board_state.castling_rights or
+                chess.popcount(board_state.occupied) > self._tb_limit):
+            return None
+        wdl = self.tablebase.probe_wdl(board_state, key)
+        if wdl is None:
+            return None
+        if wdl > 1:
+            return TABLEBASE_WIN_SCORE - ply
+        if wdl < -1:
+            return -TABLEBASE_WIN_SCORE + ply
+        # Выигрыш или проигрыш, которые не успевают до правила 50 ходов, почти ничья
+        return wdl
+
+    def tablebase_move(self, board_state, info_callback=None):
+        """Ход из таблиц Syzygy в корне, оптимальный по DTZ, или None"""
+        if self.tablebase is None:
+            return None
+        start_time = time.time()
+        result = self.tablebase.root_move(board_state)
+        if result is None:
+            return None
+        move, score, dtz = result
+        self.score = score
+        self.pv = [move]
+        self.stats.source = "tablebase"
+        self._report(info_callback, 1, start_time)
+        self._log(f"📖 Ход из таблиц Syzygy: {move.uci()} (DTZ {dtz})")
+        return move
+
+    def cached_move(self, board_state, depth=None, info_callback=None):
+        """Ход из постоянного кеша: результат ровно глубины depth или, если
+        depth = None, любой сохранённый"""
+        if not self._cache_usable(board_state):
+            return None
+        start_time = time.time()
+        entry = self.persistent_cache.lookup(chess.polyglot.zobrist_hash(board_state), depth or 0, depth)
+        if entry is None:
+            return None
+        depth, move_uci, score, pv = entry
+        move = chess.Move.from_uci(move_uci)
+        if move not in board_state.legal_moves:
+            return None
+        self.score = score
+        self.pv = [move]
+        pv_board = board_state.copy(stack=False)
+        pv_board.push(move)
+        for uci in pv[1:]:
+            pv_move = chess.Move.from_uci(uci)
+            if pv_move not in pv_board.legal_moves:
+                break
+            self.pv.append(pv_move)
+            pv_board.push(pv_move)
+        self.stats.source = "cache"
+        self._report(info_callback, depth, start_time)
+        self._log(f"💾 Ход из постоянного кеша: {move.uci()} (глубина {depth})")
+        return move
+
+    @staticmethod
+    def _cache_usable(board_state):
+        """Кеш хранит результат по одной позиции без истории партии: рядом с
+        правилом 50 ходов или после повторений позиций лучший ход зависит от
+        истории, и такие результаты не читаются и не записываются"""
+        if board_state.halfmove_clock >= CACHE_MAX_HALFMOVE_CLOCK:
+            return False
+        # Повторение возможно только среди позиций после последнего взятия или хода пешкой
+        board_copy = board_state.copy()
+        seen = set()
+        for _ in range(min(board_state.halfmove_clock, len(board_copy.move_stack)) + 1):
+            key = chess.polyglot.zobrist_hash(board_copy)
+            if key in seen:
+                return False
+            seen.add(key)
+            if board_copy.move_stack:
+                board_copy.pop()
+        return True
+
+    def evaluate_position(self, board_state):
+        """Оценка позиции с точки зрения стороны, делающей ход"""
+        return self.evaluator.evaluate(board_state)
+
+    def _evaluate_white(self, board_state):
+        """Оценка с точки зрения белых, как ожидает minimax"""
+        score = self.evaluator.evaluate(board_state)
+        return score if board_state.turn == chess.WHITE else -score
+
+    def minimax(self, board_state, depth, alpha, beta, maximizing_player, ply=0):
+        """Алгоритм минимакс с альфа-бета отсечением"""
+        if depth == 0 and self.use_quiescence:
+            if board_state.turn == chess.WHITE:
+                return self.quiescence(board_state, alpha, beta, ply), None
+            return -self.quiescence(board_state, -beta, -alpha, ply), None
+
+        self._count_node()
+        if depth == 0:
+            return self._evaluate_white(board_state), None
+
+        alpha_orig, beta_orig = alpha, beta
+        key = chess.polyglot.zobrist_hash(board_state)
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_depth, tt_score, tt_flag, tt_move = entry
+            if tt_depth >= depth:
+                if tt_flag == TT_EXACT:
+                    return tt_score, tt_move
+                if tt_flag == TT_LOWER:
+                    alpha = max(alpha, tt_score)
+                elif tt_flag == TT_UPPER:
+                    beta = min(beta, tt_score)
+                if alpha >= beta:
+                    return tt_score, tt_move
+
+        if self._tb_limit and ply > 0:
+            tb_score = self._probe_tablebase(board_state, key, ply)
+            if tb_score is not None:
+                return (tb_score if board_state.turn == chess.WHITE else -tb_score), None
+
+        outcome = board_state.outcome()
+        if outcome is not None:
+            if outcome.winner is None:
+                return 0, None
+            mate = MATE_SCORE - ply
+            return (mate if outcome.winner == chess.WHITE else -mate), None
+
+        best_move = None
+        legal_moves_list = self.move_orderer.order(board_state, list(board_state.legal_moves), ply,
+                                                   self._pv_hints.get(key, tt_move))
+
+        if maximizing_player:
+            max_eval = -float('inf')
+            for index, move in enumerate(legal_moves_list):
+                self.evaluator.push(board_state, move)
+                eval_score, _ = self.minimax(board_state, depth - 1, alpha, beta, False, ply + 1)
+                self.evaluator.pop(board_state)
+
+                if eval_score > max_eval:
+                    max_eval = eval_score
+                    best_move = move
+
+                alpha = max(alpha, eval_score)
+                if beta <= alpha:
+                    self.move_orderer.record_cutoff(board_state, move, ply, depth, index)
+                    break
+            self._store_tt(key, depth, max_eval, alpha_orig, beta_orig, best_move)
+            return max_eval, best_move
+        else:
+            min_eval = float('inf')
+            for index, move in enumerate(legal_moves_list):
+                self.evaluator.push(board_state, move)
+                eval_score, _ = self.minimax(board_state, depth - 1, alpha, beta, True, ply + 1)
+                self.evaluator.pop(board_state)
+
+                if eval_score < min_eval:
+                    min_eval = eval_score
+                    best_move = move
+
+                beta = min(beta, eval_score)
+                if beta <= alpha:
+                    self.move_orderer.record_cutoff(board_state, move, ply, depth, index)
+                    break
+            self._store_tt(key, depth, min_eval, alpha_orig, beta_orig, best_move)
+            return min_eval, best_move
+
+    def negamax(self, board_state, depth, alpha, beta, ply=0, allow_null=True):
+        """Negamax с поиском главного варианта, нулевым ходом и сокращением поздних ходов
+
+        Оценки даются с точки зрения стороны, делающей ход.
+        """
+        if depth <= 0:
+            if self.use_quiescence:
+                return self.quiescence(board_state, alpha, beta, ply), None
+            self._count_node()
+            return self.evaluate_position(board_state), None
+
+        self._count_node()
+        pv_node = beta - alpha > 1
+
+        if ply > 0 and (board_state.halfmove_clock >= 100 or board_state.is_repetition(2)):
+            return 0, None
+
+        alpha_orig = alpha
+        key = chess.polyglot.zobrist_hash(board_state)
+        tt_move = None
+        entry = self.tt.probe(key)
+        if entry is not None:
+            tt_depth, tt_score, tt_flag, tt_move = entry
+            if tt_depth >= depth and not pv_node:
+                tt_score = self._score_from_tt(tt_score, ply)
+                if (tt_flag == TT_EXACT or
+                        (tt_flag == TT_LOWER and tt_score >= beta) or
+                        (tt_flag == TT_UPPER and tt_score <= alpha)):
+                    return tt_score, tt_move
+
+        if self._tb_limit and ply > 0:
+            tb_score = self._probe_tablebase(board_state, key, ply)
+            if tb_score is not None:
+                return tb_score, None
+
+        in_check = board_state.is_check()
+        if in_check:
+            depth += 1
+
+        # Нулевой ход: если даже пропуск хода держит оценку выше beta, узел отсекается
+        own = board_state.occupied_co[board_state.turn]
+        if (allow_null and not pv_node and not in_check and depth >= NULL_MOVE_MIN_DEPTH and
+                own & ~(board_state.pawns | board_state.kings)):
+            reduction = 3 if depth >= 6 else 2
+            self.evaluator.push(board_state, chess.Move.null())
+            null_score, _ = self.negamax(board_state, depth - 1 - reduction, -beta, -beta + 1,
+                                         ply + 1, False)
+            null_score = -null_score
+            self.evaluator.pop(board_state)
+            if null_score >= beta and null_score < MATE_BOUND:
+                return beta, None
+
+        moves = list(board_state.legal_moves)
+        if not moves:
+            return (-MATE_SCORE + ply if in_check else 0), None
+        moves = self.move_orderer.order(board_state, moves, ply, self._pv_hints.get(key, tt_move))
+
+        best_score = -MATE_SCORE - 1
+        best_move = None
+        for index, move in enumerate(moves):
+            quiet = not move.promotion and not board_state.is_capture(move)
+            self.evaluator.push(board_state, move)
+            if index == 0:
+                score = -self.negamax(board_state, depth - 1, -beta, -alpha, ply + 1)[0]
+            else:
+                reduction = 0
+                if (depth >= LMR_MIN_DEPTH and index >= LMR_MIN_MOVE_INDEX and quiet and
+                        not in_check and not board_state.is_check()):
+                    reduction = 1 if index < 8 else 2
+                score = -self.negamax(board_state, depth - 1 - reduction, -alpha - 1, -alpha, ply + 1)[0]
+                if reduction and score > alpha:
+                    score = -self.negamax(board_state, depth - 1, -alpha - 1, -alpha, ply + 1)[0]
+                if alpha < score < beta:
+                    score = -self.negamax(board_state, depth - 1, -beta, -alpha, ply + 1)[0]
+            self.evaluator.pop(board_state)
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if ply == 0:
+                    self._root_best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.move_orderer.record_cutoff(board_state, move, ply, depth, index)
+                break
+
+        self.tt.store(key, depth, self._score_to_tt(best_score, ply),
+                      self._bound_flag(best_score, alpha_orig, beta), best_move)
+        return best_score, best_move
+
+    @staticmethod
+    def _score_to_tt(score, ply):
+        """Матовые оценки хранятся относительно узла, а не корня"""
+        if score >= MATE_BOUND:
+            return score + ply
+        if score <= -MATE_BOUND:
+            return score - ply
+        return score
+
+    @staticmethod
+    def _score_from_tt(score, ply):
+        if score >= MATE_BOUND:
+            return score - ply
+        if score <= -MATE_BOUND:
+            return score + ply
+        return score
+
+    def stop(self):
+        """Просит текущий поиск завершиться; вызывается из другого потока
+
+        Флаг сбрасывается в конце get_best_move, так что он действует и на
+        поиск, который уже запрошен, но ещё не начался.
+        """
+        self.stop_requested = True
+        if self._stop_event is not None:
+            self._stop_event.set()
+        self._ponder_wake.set()
+
+    def ponderhit(self):
+        """Соперник сыграл ожидаемый ход: поиск в режиме ponder продолжается
+        с обычными ограничениями, отсчитываемыми с этого момента
+
+        Таблица транспозиций и уже пройденные итерации сохраняются. Если
+        нужная глубина уже пройдена, поиск завершается сразу. Как и stop(),
+        вызов действует и на поиск, который ещё не начался.
+        """
+        with self._ponder_lock:
+            self._ponderhit = True
+            limits = self._ponder_limits
+            if limits is not None:
+                depth, time_budget = limits
+                self._budget_start = time.time()
+                self._time_budget = time_budget
+                self._max_depth = depth
+                if time_budget is not None and self.current_depth > 1:
+                    self._deadline = self._budget_start + time_budget
+                if self.current_depth - 1 >= depth:
+                    self.stop()
+        self._ponder_wake.set()
+
+    def _count_node(self):
+        self.nodes += 1
+        if self.stop_requested:
+            raise SearchTimeout()
+        if self.nodes % TIME_CHECK_INTERVAL == 0:
+            if self._deadline is not None and time.time() >= self._deadline:
+                raise SearchTimeout()
+            if self._node_limit is not None and self.nodes >= self._node_limit:
+                raise SearchTimeout()
+            if self._stop_event is not None and self._stop_event.is_set():
+                raise SearchTimeout()
+
+    def quiescence(self, board_state, alpha, beta, ply):
+        """Форсированный поиск взятий и превращений в листьях (для стороны, делающей ход)"""
+        self._count_node()
+        self.qnodes += 1
+
+        if board_state.is_check():
+            # Под шахом оценка "на месте" невозможна: перебираем все ответы
+            moves = list(board_state.legal_moves)
+            if not moves:
+                return -MATE_SCORE + ply
+            best_score = -MATE_SCORE + ply
+            stand_pat = None
+        else:
+            stand_pat = self.evaluate_position(board_state)
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+            best_score = stand_pat
+            moves = list(board_state.generate_legal_captures())
+            moves.extend(move for move in board_state.generate_legal_moves(board_state.pawns, BB_BACKRANKS)
+                         if not board_state.is_capture(move))
+
+        for move in self.move_orderer.order(board_state, moves, ply):
+            if stand_pat is not None and not move.promotion:
+                # Дельта-отсечение: даже взятие без ответа не поднимет оценку до alpha
+                if board_state.is_en_passant(move):
+                    gain = self.piece_values[chess.PAWN]
+                else:
+                    gain = self.piece_values[board_state.piece_type_at(move.to_square)]
+                if stand_pat + gain + DELTA_MARGIN <= alpha:
+                    continue
+
+            self.evaluator.push(board_state, move)
+            score = -self.quiescence(board_state, -beta, -alpha, ply + 1)
+            self.evaluator.pop(board_state)
+
+            if score > best_score:
+                best_score = score
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+
+        return best_score
+
+    @staticmethod
+    def _bound_flag(score, alpha, beta):
+        """Тип границы оценки относительно исходного окна поиска"""
+        if score <= alpha:
+            return TT_UPPER
+        if score >= beta:
+            return TT_LOWER
+        return TT_EXACT
+
+    def _store_tt(self, key, depth, score, alpha, beta, best_move):
+        """Сохраняет результат узла с типом границы относительно исходного окна"""
+        self.tt.store(key, depth, score, self._bound_flag(score, alpha, beta), best_move)
+
+    def allocate_time(self, movetime_ms=None, clock_ms=None, increment_ms=0, moves_to_go=None):
+        """Бюджет времени на ход в секундах (None - поиск на фиксированную глубину)"""
+        if movetime_ms is not None:
+            return max(movetime_ms, 1) / 1000
+        if clock_ms is None:
+            return None
+        budget = clock_ms / (moves_to_go or 30) + increment_ms * 0.75
+        budget = min(budget, clock_ms - 50, clock_ms * 0.5)
+        return max(budget, 10) / 1000
+
+    def extract_pv(self, board_state, max_length):
+        """Восстанавливает главный вариант по таблице транспозиций"""
+        pv = []
+        seen = set()
+        board_copy = board_state.copy(stack=False)
+        while len(pv) < max_length:
+            key = chess.polyglot.zobrist_hash(board_copy)
+            if key in seen:
+                break
+            seen.add(key)
+            move = self.tt.best_move(key)
+            if move is None or move not in board_copy.legal_moves:
+                break
+            pv.append(move)
+            board_copy.push(move)
+        return pv
+
+    def _set_pv(self, board_state, pv):
+        """Запоминает главный вариант для упорядочивания ходов следующей итерации"""
+        self.pv = pv
+        self._pv_hints = {}
+        pv_board = board_state.copy(stack=False)
+        for pv_move in pv:
+            self._pv_hints[chess.polyglot.zobrist_hash(pv_board)] = pv_move
+            pv_board.push(pv_move)
+
+    def search_root_moves(self, board_state, depth, root_moves, deadline=None, alpha=-MATE_SCORE - 1,
+                          first_index=0):
+        """PVS по заданному подмножеству ходов корня
+
+        Если alpha не задана, первый ход ищется с полным окном; остальные ходы
+        ищутся с нулевым окном вокруг alpha и переискиваются, если превысили её.
+        first_index - номер первого хода в полном списке корня: поздние тихие
+        ходы сокращаются так же, как в negamax. Возвращает (score, best_move, {move: score}) или None, если истекло
+        время. best_move = None, если ни один ход не превысил alpha; оценки
+        таких ходов - верхние границы.
+        """
+        self._deadline = deadline
+        self.evaluator.reset(board_state)
+        stack_size = len(board_state.move_stack)
+        beta = MATE_SCORE + 1
+        best_score, best_move = alpha, None
+        scores = {}
+        in_check = board_state.is_check()
+        if in_check:
+            depth += 1
+        try:
+            for index, move in enumerate(root_moves, first_index):
+                quiet = not move.promotion and not board_state.is_capture(move)
+                self.evaluator.push(board_state, move)
+                if alpha < -MATE_SCORE:
+                    score = -self.negamax(board_state, depth - 1, -beta, -alpha, 1)[0]
+                else:
+                    reduction = 0
+                    if (depth >= LMR_MIN_DEPTH and index >= LMR_MIN_MOVE_INDEX and quiet and
+                            not in_check and not board_state.is_check()):
+                        reduction = 1 if index < 8 else 2
+                    score = -self.negamax(board_state, depth - 1 - reduction, -alpha - 1, -alpha, 1)[0]
+                    if reduction and score > alpha:
+                        score = -self.negamax(board_state, depth - 1, -alpha - 1, -alpha, 1)[0]
+                    if score > alpha:
+                        score = -self.negamax(board_state, depth - 1, -beta, -alpha, 1)[0]
+                self.evaluator.pop(board_state)
+
+                scores[move] = score
+                if score > best_score:
+                    best_score, best_move = score, move
+                    alpha = max(alpha, score)
+        except SearchTimeout:
+            while len(board_state.move_stack) > stack_size:
+                board_state.pop()
+            return None
+        finally:
+            self._deadline = None
+        return best_score, best_move, scores
+
+    def _report(self, info_callback, depth, start_time):
+        """Записывает завершённую итерацию в stats и передаёт её info_callback (для UCI и интерфейсов)"""
+        elapsed = max(time.time() - start_time, 1e-6)
+        self.stats.add_iteration(depth, self.nodes, elapsed * 1000, self.score, self.pv)
+        if info_callback is None:
+            return
+        info_callback({
+            "depth": depth,
+            "score": self.score,
+            "nodes": self.nodes,
+            "nps": int(self.nodes / elapsed),
+            "time_ms": int(elapsed * 1000),
+            "pv": list(self.pv),
+        })
+
+    def _get_executor(self):
+        """Пул процессов параллельного поиска; создаётся и прогревается при первом обращении"""
+        if self._executor is None:
+            config = {
+                # Размер TT делится между исполнителями, а не повторяется в каждом
+                "tt_size_mb": max(1, self.tt.size_mb // self.workers),
+                "pawn_hash_mb": self.evaluator.pawn_table.size_mb,
+                "syzygy_path": self.tablebase.paths if self.tablebase is not None else None,
+                "syzygy_probe_limit": self.tablebase.probe_limit if self.tablebase is not None else 0,
+                "tt_policy": self.tt.policy,
+                "quiescence": self.use_quiescence,
+            }
+            context = spawn_context()
+            self._stop_event = context.Event()
+            self._shared_alpha = context.Value("i", 0)
+            state = {"stop_event": self._stop_event, "alpha": self._shared_alpha,
+                     "barrier": context.Barrier(self.workers), "search_id": None}
+            self._executor = engine_pool(self.workers, config, state)
+            # Запуск процессов и создание их движков занимают секунды: ждём здесь,
+            # а не внутри первого поиска с ограничением времени
+            futures = [self._executor.submit(_wait_parallel_worker) for _ in range(self.workers)]
+            for future in futures:
+                future.result()
+        return self._executor
+
+    def set_workers(self, workers):
+        """Меняет число процессов поиска; новый пул запускается сразу"""
+        if workers < 1:
+            raise ValueError("Число процессов поиска должно быть не меньше 1")
+        if workers != self.workers:
+            self._close_executor()
+            self.workers = workers
+            if workers > 1:
+                self._get_executor()
+
+    def set_hash(self, size_mb):
+        """Меняет размер TT; пул процессов перезапускается с новым размером
+
+        В параллельном режиме каждый исполнитель получает size_mb / workers.
+        """
+        self.tt.resize(size_mb)
+        if self._executor is not None:
+            self._close_executor()
+            self._get_executor()
+
+    def _close_executor(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._stop_event = None
+            self._shared_alpha = None
+
+    def shutdown(self):
+        """Останавливает пул процессов параллельного поиска, закрывает книги, таблицы и кеш"""
+        self._close_executor()
+        if self.polyglot_book is not None:
+            self.polyglot_book.close()
+        if self.tablebase is not None:
+            self.tablebase.close()
+        if self.persistent_cache is not None:
+            self.persistent_cache.close()
+
+    def _start_limits(self, max_depth, time_budget, start_time):
+        """Ограничения итеративного углубления; читаются между итерациями,
+        поэтому ponderhit() может заменить их во время поиска"""
+        with self._ponder_lock:
+            if self._ponderhit and self._ponder_limits is not None:
+                # ponderhit() пришёл до первой итерации
+                max_depth, time_budget = self._ponder_limits
+            self._max_depth = max_depth
+            self._time_budget = time_budget
+            self._budget_start = start_time
+
+    def parallel_iterative_deepening(self, board_state, max_depth, time_budget=None, node_limit=None,
+                                     info_callback=None):
+        """Итеративное углубление с разбиением ходов корня между процессами
+
+        Мелкие итерации ищутся целиком в главном процессе. В остальных первый
+        ход (лучший на прошлой итерации) ищется здесь же с полным окном, а его
+        оценка становится общей alpha: процессы пула берут остальные ходы по
+        одному и ищут их с нулевым окном, ход, превысивший alpha, переискивается
+        и поднимает её для всех. Лимит узлов проверяется между итерациями.
+        """
+        executor = self._get_executor()
+        start_time = time.time()
+        self.nodes = 0
+        self.qnodes = 0
+        self.pv = []
+        self._pv_hints = {}
+        best_move = None
+        if not self.stop_requested:
+            self._stop_event.clear()
+        self._parallel_search_id += 1
+        root_fen = board_state.root().fen()
+        stack = [move.uci() for move in board_state.move_stack]
+        root_moves = self.move_orderer.order(board_state, list(board_state.legal_moves), 0)
+        if not root_moves:
+            return None
+        key = chess.polyglot.zobrist_hash(board_state)
+        deadline = None
+        self._start_limits(max_depth, time_budget, start_time)
+
+        depth = 1
+        while depth <= self._max_depth:
+            self.current_depth = depth
+            if depth < PARALLEL_MIN_DEPTH or len(root_moves) == 1:
+                result = self.search_root_moves(board_state, depth, root_moves, deadline)
+                if result is None:
+                    break
+                score, move, scores = result
+                pv = None
+            else:
+                result = self.search_root_moves(board_state, depth, root_moves[:1], deadline)
+                if result is None:
+                    break
+                score, move, scores = result
+                pv = None
+                self._shared_alpha.value = score
+                futures = [
+                    executor.submit(_parallel_root_worker, self._parallel_search_id, root_fen,
+                                    board_state.chess960, stack, other.uci(), index, depth, deadline)
+                    for index, other in enumerate(root_moves[1:], 1)
+                ]
+                complete = True
+                improved = False
+                for future in futures:
+                    worker_result = future.result()
+                    if worker_result is None:
+                        complete = False
+                        continue
+                    move_uci, move_score, move_pv, nodes, qnodes = worker_result
+                    self.nodes += nodes
+                    self.qnodes += qnodes
+                    scores[chess.Move.from_uci(move_uci)] = move_score
+                    # Оценка точная, только если ход превысил alpha и был переискан
+                    if move_pv and move_score > score:
+                        score, move = move_score, chess.Move.from_uci(move_uci)
+                        pv = [chess.Move.from_uci(uci) for uci in move_pv]
+                        improved = True
+                if not complete:
+                    # Ход, доказанно лучший первого на этой глубине, лучше хода прошлой итерации
+                    if improved:
+                        best_move, self.score, self.pv = move, score, pv
+                    break
+
+            self.score = score
+            best_move = move
+            self.tt.store(key, depth, score, TT_EXACT, move)
+            if pv is None:
+                board_state.push(move)
+                pv = [move] + self.extract_pv(board_state, depth - 1)
+                board_state.pop()
+            self._set_pv(board_state, pv)
+            root_moves.sort(key=lambda root_move: scores.get(root_move, -MATE_SCORE - 1), reverse=True)
+            self._report(info_callback, depth, start_time)
+
+            if self.stop_requested or (node_limit is not None and self.nodes >= node_limit):
+                break
+            if self._time_budget is not None:
+                if time.time() - self._budget_start >= self._time_budget * 0.5:
+                    break
+                deadline = self._budget_start + self._time_budget
+            depth += 1
+
+        return best_move
+
+    def iterative_deepening(self, board_state, max_depth, time_budget=None, node_limit=None,
+                            info_callback=None):
+        """Углубляет поиск 1, 2, 3... пока не достигнута глубина или не истекло время"""
+        start_time = time.time()
+        self.nodes = 0
+        self.qnodes = 0
+        self.pv = []
+        self._pv_hints = {}
+        self._deadline = None
+        self._node_limit = node_limit
+        self._root_best_move = None
+        best_move = None
+        maximizing = board_state.turn == chess.WHITE
+        stack_size = len(board_state.move_stack)
+        self.evaluator.reset(board_state)
+        if self._tt_algorithm != self.search_algorithm:
+            # minimax хранит оценки с точки зрения белых, negamax - стороны на ходу
+            self.tt.clear()
+            self._tt_algorithm = self.search_algorithm
+        self._start_limits(max_depth, time_budget, start_time)
+
+        try:
+            depth = 1
+            while depth <= self._max_depth:
+                self.current_depth = depth
+                if self.search_algorithm == "minimax":
+                    score, move = self.minimax(board_state, depth, -float('inf'), float('inf'), maximizing)
+                    score = score if maximizing else -score
+                else:
+                    score, move = self.negamax(board_state, depth, -MATE_SCORE - 1, MATE_SCORE + 1)
+                if move is not None:
+                    best_move = move
+                    self.score = score
+
+                pv = self.extract_pv(board_state, depth)
+                self._set_pv(board_state, pv or ([best_move] if best_move is not None else []))
+                self._report(info_callback, depth, start_time)
+
+                if self._time_budget is not None:
+                    elapsed = time.time() - self._budget_start
+                    # Следующая итерация почти наверняка не успеет завершиться
+                    if elapsed >= self._time_budget * 0.5:
+                        break
+                    self._deadline = self._budget_start + self._time_budget
+                depth += 1
+        except SearchTimeout:
+            # Прерванная итерация оставляет на доске незавершённые ходы
+            while len(board_state.move_stack) > stack_size:
+                board_state.pop()
+            if best_move is None:
+                best_move = self._root_best_move
+        finally:
+            self._deadline = None
+            self._node_limit = None
+
+        return best_move
+
+    def search_progress(self):
+        """Доля выполненного поиска от 0 до 1 для индикаторов (читается из другого потока)
+
+        При лимите времени - доля истраченного бюджета. При лимите глубины -
+        пройденные итерации плюс доля текущей, оценённая по росту числа узлов
+        между предыдущими итерациями.
+        """
+        if self._time_budget:
+            return min((time.time() - self._budget_start) / self._time_budget, 1.0)
+        if self._max_depth <= 0:
+            return 0.0
+        iterations = self.stats.iterations
+        completed = len(iterations)
+        fraction = 0.0
+        if completed >= 2 and iterations[-2]["nodes"]:
+            last_nodes = iterations[-1]["nodes"]
+            expected = (last_nodes - iterations[-2]["nodes"]) * last_nodes / iterations[-2]["nodes"]
+            if expected > 0:
+                fraction = min((self.nodes - last_nodes) / expected, 0.95)
+        return min((completed + max(fraction, 0.0)) / self._max_depth, 1.0)
+
+    def get_best_move(self, board_state, difficulty_level, movetime_ms=None,
+                      clock_ms=None, increment_ms=0, moves_to_go=None, depth=None,
+                      nodes=None, infinite=False, ponder=False, info_callback=None, profile=None):
+        """Получение лучшего хода
+
+        Без ограничения времени глубина определяется сложностью (или явно
+        параметром depth). При заданном movetime_ms (или остатке часов clock_ms
+        с добавлением increment_ms) поиск углубляется, пока не исчерпан бюджет
+        времени на ход. nodes ограничивает число узлов, infinite - поиск до
+        вызова stop(). info_callback получает словарь со сведениями о каждой
+        завершённой итерации.
+
+        ponder=True - поиск в позиции после ожидаемого хода соперника: до
+        ponderhit() он не ограничен, после - действуют обычные ограничения.
+        Ход возвращается только после ponderhit() или stop().
+
+        После поиска self.stats содержит SearchStats этого вызова. profile
+        ("cprofile" или "sample") включает профилировщик на время поиска,
+        его отчёт попадает в stats.profile.
+        """
+        stats = SearchStats()
+        self.stats = stats
+        self.nodes = 0
+        self.qnodes = 0
+        self.current_depth = 0
+        self.score = 0
+        self.pv = []
+        tt_hits, tt_probes = self.tt.hits, self.tt.hits + self.tt.misses
+        cutoffs, first_move_cutoffs = self.move_orderer.cutoffs, self.move_orderer.first_move_cutoffs
+        pawn_table = self.evaluator.pawn_table
+        pawn_hits, pawn_probes = pawn_table.hits, pawn_table.hits + pawn_table.misses
+        tb_hits = self.tablebase.hits if self.tablebase is not None else 0
+        self._prepare_tablebase()
+        profiler = make_profiler(profile)
+        start_time = time.perf_counter()
+        if profiler is not None:
+            profiler.start()
+        try:
+            move = self._get_best_move(board_state, difficulty_level, movetime_ms, clock_ms, increment_ms,
+                                       moves_to_go, depth, nodes, infinite, ponder, info_callback)
+        finally:
+            if profiler is not None:
+                profiler.stop()
+                stats.profile = profiler.report()
+            stats.time_ms = (time.perf_counter() - start_time) * 1000
+
+        stats.move = move
+        stats.score = self.score
+        stats.depth = stats.iterations[-1]["depth"] if stats.iterations else 0
+        stats.pv = list(self.pv)
+        stats.nodes = self.nodes
+        stats.qnodes = self.qnodes
+        if self.tt.hits >= tt_hits:
+            stats.tt_hits = self.tt.hits - tt_hits
+            stats.tt_probes = self.tt.hits + self.tt.misses - tt_probes
+        else:
+            # Таблицу очистили во время поиска (смена алгоритма) - счётчики начались заново
+            stats.tt_hits = self.tt.hits
+            stats.tt_probes = self.tt.hits + self.tt.misses
+        stats.cutoffs = self.move_orderer.cutoffs - cutoffs
+        stats.first_move_cutoffs = self.move_orderer.first_move_cutoffs - first_move_cutoffs
+        stats.pawn_hits = pawn_table.hits - pawn_hits
+        stats.pawn_probes = pawn_table.hits + pawn_table.misses - pawn_probes
+        if self.tablebase is not None:
+            stats.tb_hits = self.tablebase.hits - tb_hits
+        if (self.persistent_cache is not None and stats.source == "search" and move is not None and
+                stats.depth >= self.persistent_cache.min_depth and self._cache_usable(board_state)):
+            self.persistent_cache.store(chess.polyglot.zobrist_hash(board_state), stats.depth, move.uci(),
+                                        stats.score, [pv_move.uci() for pv_move in stats.pv], stats.nodes)
+        return move
+
+    def _get_best_move(self, board_state, difficulty_level, movetime_ms, clock_ms, increment_ms,
+                       moves_to_go, depth, nodes, infinite, ponder, info_callback):
+        try:
+            # В режиме ponder ход ждёт ponderhit(), поэтому мгновенные ответы (мат или пат,
+            # книга, таблицы в корне) не используются: идёт обычный поиск с таблицами в узлах
+            if not ponder:
+                if not any(board_state.legal_moves):
+                    # Мат или пат: искать нечего, оценка известна без поиска
+                    self.score = -MATE_SCORE if board_state.is_check() else 0
+                    self.stats.source = "terminal"
+                    return None
+
+                if self.use_book:
+                    move = self.book_move(board_state)
+                    if move is not None:
+                        self._log(f"📚 Ход из базы дебютов: {move.uci()}")
+                        self.stats.source = "book"
+                        return move
+
+                move = self.tablebase_move(board_state, info_callback)
+                if move is not None:
+                    return move
+
+            time_budget = None if infinite else self.allocate_time(movetime_ms, clock_ms, increment_ms,
+                                                                   moves_to_go)
+            if depth is None:
+                if time_budget is None and nodes is None and not infinite:
+                    depth = DIFFICULTY_DEPTHS.get(difficulty_level, DIFFICULTY_DEPTHS[4])
+                else:
+                    depth = MAX_SEARCH_DEPTH
+
+            # Поиск заданной глубины (уровень сложности) берёт результат только той же
+            # глубины; по времени нужная глубина заранее неизвестна, годится любой
+            if self.persistent_cache is not None and not (ponder or infinite):
+                move = self.cached_move(board_state, depth if depth < MAX_SEARCH_DEPTH else None, info_callback)
+                if move is not None:
+                    return move
+
+            with self._ponder_lock:
+                if ponder and not self._ponderhit:
+                    self._ponder_limits = (depth, time_budget)
+                    depth, time_budget = MAX_SEARCH_DEPTH, None
+                    self.current_depth = 0
+
+            self.tt.new_search()
+            self.move_orderer.new_search()
+            stack_size = len(board_state.move_stack)
+            try:
+                if self.workers > 1 and self.search_algorithm == "pvs":
+                    best_move = self.parallel_iterative_deepening(board_state, depth, time_budget, nodes,
+                                                                  info_callback)
+                else:
+                    best_move = self.iterative_deepening(board_state, depth, time_budget, nodes,
+                                                         info_callback)
+            except Exception as e:
+                # Ошибка в поиске - ошибка движка: о ней сообщается всегда, а ход
+                # выбирается запасным способом из корневой позиции
+                self._warn(f"Ошибка в минимаксе: {type(e).__name__}: {e}")
+                while len(board_state.move_stack) > stack_size:
+                    board_state.pop()
+                best_move = None
+
+            if ponder:
+                # Поиск мог закончиться раньше (мат, предел глубины) - ждём ответа соперника
+                while not (self._ponderhit or self.stop_requested):
+                    self._ponder_wake.wait()
+                    self._ponder_wake.clear()
+        finally:
+            with self._ponder_lock:
+                self._ponder_limits = None
+                self._ponderhit = False
+            self._ponder_wake.clear()
+            self.stop_requested = False
+
+        if best_move is None or best_move not in board_state.legal_moves:
+
+            legal_moves_list = list(board_state.legal_moves)
+            if legal_moves_list:
+                self.stats.source = "fallback"
+
+                for move in legal_moves_list:
+                    if board_state.gives_check(move):
+                        return move
+                for move in legal_moves_list:
+                    if board_state.is_capture(move):
+                        return move
+                return random.choice(legal_moves_list)
+
+        return best_move
+
+
+
+def spawn_context():
+    """Контекст multiprocessing для всех пулов процессов пакета
+
+    spawn вместо fork: поиск запускают из фоновых потоков, а fork при
+    занятых другими потоками блокировках (например, чтении stdin) виснет.
+    """
+    # Импорт откладывается до первого пула процессов ради быстрого старта
+    import multiprocessing
+
+    return multiprocessing.get_context("spawn")
+
+
+def engine_pool(workers, engine_options=None, state=None):
+    """Пул процессов spawn; с engine_options каждый процесс создаёт свой движок
+
+    Задачи пула получают движок через process_engine(), а state (события,
+    очереди и другие объекты, которые можно передать только при запуске
+    процесса) - через process_state().
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    if engine_options is None:
+        return ProcessPoolExecutor(workers, mp_context=spawn_context())
+    return ProcessPoolExecutor(workers, mp_context=spawn_context(), initializer=init_process_engine,
+                               initargs=(engine_options, state))
+
+
+_process_engine = None
+_process_state = {}
+
+
+def init_process_engine(engine_options, state=None):
+    """Создаёт движок процесса; его TT живёт между задачами
+
+    Инициализатор процессов engine_pool. Без пула вызывается в главном
+    процессе, чтобы те же задачи можно было выполнить на месте.
+    """
+    global _process_engine, _process_state
+    _process_engine = PurePythonAI(**engine_options)
+    _process_state = state or {}
+
+
+def process_engine():
+    return _process_engine
+
+
+def process_state():
+    return _process_state
+
+
+def _wait_parallel_worker():
+    """Задача прогрева: завершается, когда запущены и готовы все процессы пула"""
+    try:
+        _process_state["barrier"].wait(WORKER_START_TIMEOUT)
+    except threading.BrokenBarrierError:
+        pass
+
+
+def _parallel_root_worker(search_id, root_fen, chess960, stack, move_uci, index, depth, deadline):
+    """Ищет один ход корня в процессе пула с нулевым окном вокруг общей alpha
+
+    Возвращает (ход, оценка, PV, узлы, узлы форсированного поиска); PV
+    пуст, если ход не превысил alpha и его оценка - только верхняя граница.
+    """
+    board_state = chess.Board(root_fen, chess960=chess960)
+    for uci in stack:
+        board_state.push_uci(uci)
+    engine = _process_engine
+    shared_alpha = _process_state["alpha"]
+    if search_id != _process_state["search_id"]:
+        _process_state["search_id"] = search_id
+        engine._stop_event = _process_state["stop_event"]
+        engine._prepare_tablebase()
+        engine.tt.new_search()
+        engine.move_orderer.new_search()
+    engine.nodes = 0
+    engine.qnodes = 0
+    move = chess.Move.from_uci(move_uci)
+    result = engine.search_root_moves(board_state, depth, [move], deadline, shared_alpha.value, index)
+    if result is None:
+        return None
+    score, best_move, scores = result
+    pv = []
+    if best_move is not None:
+        with shared_alpha.get_lock():
+            if score > shared_alpha.value:
+                shared_alpha.value = score
+        board_state.push(best_move)
+        pv = [move_uci] + [pv_move.uci() for pv_move in engine.extract_pv(board_state, depth - 1)]
+    return move_uci, scores[move], pv, engine.nodes, engine.qnodes
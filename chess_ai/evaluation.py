@@ -0,0 +1,385 @@
+"""Статическая оценка позиции"""
+
+import chess
+
+from .pawns import PawnHashTable, pawn_key, pawn_key_delta
+
+
+# Таблицы фигура-поле для миттельшпиля с точки зрения белых, строки от 8-й горизонтали к 1-й
+PIECE_SQUARE_TABLES = {
+    chess.PAWN: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ],
+    chess.KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    chess.BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    chess.ROOK: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ],
+    chess.QUEEN: [
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ],
+    chess.KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20,
+    ],
+}
+
+# В эндшпиле пешки ценятся по продвижению, а король идёт в центр
+ENDGAME_PIECE_SQUARE_TABLES = {
+    **PIECE_SQUARE_TABLES,
+    chess.PAWN: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        80, 80, 80, 80, 80, 80, 80, 80,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        30, 30, 30, 30, 30, 30, 30, 30,
+        15, 15, 15, 15, 15, 15, 15, 15,
+        5, 5, 5, 5, 5, 5, 5, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ],
+    chess.KING: [
+        -50, -40, -30, -20, -20, -30, -40, -50,
+        -30, -20, -10, 0, 0, -10, -20, -30,
+        -30, -10, 20, 30, 30, 20, -10, -30,
+        -30, -10, 30, 40, 40, 30, -10, -30,
+        -30, -10, 30, 40, 40, 30, -10, -30,
+        -30, -10, 20, 30, 30, 20, -10, -30,
+        -30, -30, 0, 0, 0, 0, -30, -30,
+        -50, -30, -30, -30, -30, -30, -30, -50,
+    ],
+}
+# Поправка к стоимости фигур в эндшпиле относительно piece_values
+ENDGAME_MATERIAL_BONUS = {
+    chess.PAWN: 20, chess.KNIGHT: -20, chess.BISHOP: 0, chess.ROOK: 20, chess.QUEEN: 20, chess.KING: 0,
+}
+
+# Фаза партии: 24 при полном наборе фигур, 0 - когда остались только пешки и короли
+PHASE_WEIGHTS = {chess.KNIGHT: 1, chess.BISHOP: 1, chess.ROOK: 2, chess.QUEEN: 4}
+TOTAL_PHASE = 24
+
+# Пешечная структура: (миттельшпиль, эндшпиль)
+DOUBLED_PAWN_PENALTY = (-10, -20)
+ISOLATED_PAWN_PENALTY = (-10, -15)
+PASSED_PAWN_BONUS = [(0, 0), (5, 10), (10, 20), (15, 35), (25, 60), (40, 100), (60, 150), (0, 0)]
+
+BB_CENTER = chess.BB_D4 | chess.BB_E4 | chess.BB_D5 | chess.BB_E5
+BB_NOT_FILE_A = ~chess.BB_FILE_A & chess.BB_ALL
+BB_NOT_FILE_H = ~chess.BB_FILE_H & chess.BB_ALL
+
+# Таблицы атак python-chess; модульные имена дешевле поиска атрибутов в горячем цикле
+popcount = chess.popcount
+KNIGHT_ATTACKS = chess.BB_KNIGHT_ATTACKS
+KING_ATTACKS = chess.BB_KING_ATTACKS
+DIAG_ATTACKS, DIAG_MASKS = chess.BB_DIAG_ATTACKS, chess.BB_DIAG_MASKS
+RANK_ATTACKS, RANK_MASKS = chess.BB_RANK_ATTACKS, chess.BB_RANK_MASKS
+FILE_ATTACKS, FILE_MASKS = chess.BB_FILE_ATTACKS, chess.BB_FILE_MASKS
+CENTER_WEIGHT = 10
+MOBILITY_WEIGHT = 2
+CHECK_PENALTY = 50
+
+# Оценки миттельшпиля и эндшпиля упакованы в одно целое: младшие SCORE_SHIFT бит
+# (со знаком) - миттельшпиль, старшие - эндшпиль. Сложение упакованных чисел
+# складывает обе оценки сразу, поэтому инкрементальное обновление остаётся
+# одним сложением на ход.
+SCORE_SHIFT = 20
+SCORE_HALF = 1 << (SCORE_SHIFT - 1)
+SCORE_MASK = (1 << SCORE_SHIFT) - 1
+
+
+def make_score(mg, eg):
+    return mg + (eg << SCORE_SHIFT)
+
+
+def unpack_score(score):
+    """Упакованная оценка -> (миттельшпиль, эндшпиль)"""
+    mg = ((score + SCORE_HALF) & SCORE_MASK) - SCORE_HALF
+    return mg, (score - mg) >> SCORE_SHIFT
+
+
+def north_fill(mask):
+    """Маска, продолженная по вертикалям к 8-й горизонтали"""
+    mask |= mask << 8
+    mask |= mask << 16
+    mask |= mask << 32
+    return mask & chess.BB_ALL
+
+
+def south_fill(mask):
+    """Маска, продолженная по вертикалям к 1-й горизонтали"""
+    mask |= mask >> 8
+    mask |= mask >> 16
+    mask |= mask >> 32
+    return mask
+
+
+def adjacent_files(mask):
+    """Сдвиг маски на соседние вертикали"""
+    return ((mask & ~chess.BB_FILE_H) << 1) | ((mask & ~chess.BB_FILE_A) >> 1)
+
+
+# Байт занятых вертикалей -> маска этих вертикалей целиком; и маска соседних с ними
+FILES_BY_BYTE = [south_fill(byte << 56) for byte in range(256)]
+ADJACENT_FILES_BY_BYTE = [FILES_BY_BYTE[((byte << 1) | (byte >> 1)) & 0xFF] for byte in range(256)]
+
+
+DOUBLED_PAWN_SCORE = make_score(*DOUBLED_PAWN_PENALTY)
+ISOLATED_PAWN_SCORE = make_score(*ISOLATED_PAWN_PENALTY)
+PASSED_PAWN_SCORES = [make_score(mg, eg) for mg, eg in PASSED_PAWN_BONUS]
+
+
+def pawn_structure(white_pawns, black_pawns):
+    """Сдвоенные, изолированные и проходные пешки по маскам
+
+    Возвращает (упакованная оценка с точки зрения белых, проходные белые,
+    проходные чёрные). Пешки не перебираются по одной: сдвоенные - это пешки,
+    перед которыми на той же вертикали стоит своя; изолированные - пешки без
+    своих пешек на соседних вертикалях; проходные - передние пешки вне «тени»
+    пешек соперника (их вертикалей и соседних вертикалей перед ними).
+    """
+    white_north = north_fill(white_pawns)
+    black_south = south_fill(black_pawns)
+
+    # Задние из сдвоенных пешек: перед ними на вертикали есть своя пешка
+    white_doubled = white_pawns & (south_fill(white_pawns) >> 8)
+    black_doubled = black_pawns & (north_fill(black_pawns) << 8)
+    score = DOUBLED_PAWN_SCORE * (popcount(white_doubled) - popcount(black_doubled))
+
+    white_isolated = white_pawns & ~ADJACENT_FILES_BY_BYTE[white_north >> 56]
+    black_isolated = black_pawns & ~ADJACENT_FILES_BY_BYTE[black_south & 0xFF]
+    score += ISOLATED_PAWN_SCORE * (popcount(white_isolated) - popcount(black_isolated))
+
+    # Поля перед пешками соперника на их и соседних вертикалях
+    black_span = black_south >> 8
+    white_span = (white_north << 8) & chess.BB_ALL
+    # Задняя из сдвоенных пешек не считается проходной
+    white_passed = white_pawns & ~white_doubled & ~(black_span | adjacent_files(black_span))
+    black_passed = black_pawns & ~black_doubled & ~(white_span | adjacent_files(white_span))
+    for square in chess.scan_forward(white_passed):
+        score += PASSED_PAWN_SCORES[chess.square_rank(square)]
+    for square in chess.scan_forward(black_passed):
+        score -= PASSED_PAWN_SCORES[7 - chess.square_rank(square)]
+    return score, white_passed, black_passed
+
+
+def game_phase(board_state):
+    """Фаза от TOTAL_PHASE (все фигуры на доске) до 0 (пешечный эндшпиль)"""
+    phase = (chess.popcount(board_state.knights | board_state.bishops) +
+             2 * chess.popcount(board_state.rooks) + 4 * chess.popcount(board_state.queens))
+    return min(phase, TOTAL_PHASE)
+
+
+class IncrementalEvaluator:
+    """Оценка позиции с инкрементальным учётом материала и таблиц фигура-поле
+
+    Поиск делает ходы через push/pop, и сумма материала с бонусами полей
+    пересчитывается по разнице хода, а не обходом всей доски. Таблицы
+    миттельшпиля и эндшпиля ведутся одновременно в упакованном виде и
+    смешиваются по фазе партии. Пешечная структура, мобильность и контроль
+    центра считаются по маскам.
+
+    Вместе с оценкой в стеке ведётся Zobrist-ключ пешек, по которому оценка
+    пешечной структуры кешируется в pawn_table.
+    """
+
+    def __init__(self, piece_values, pawn_hash_mb=1):
+        # Знаковые упакованные таблицы: материал + бонус поля, у чёрных с минусом
+        self.tables = {chess.WHITE: {}, chess.BLACK: {}}
+        for piece_type, table in PIECE_SQUARE_TABLES.items():
+            endgame_table = ENDGAME_PIECE_SQUARE_TABLES[piece_type]
+            mg_value = piece_values[piece_type]
+            eg_value = mg_value + ENDGAME_MATERIAL_BONUS[piece_type]
+            self.tables[chess.WHITE][piece_type] = [
+                make_score(mg_value + table[square ^ 56], eg_value + endgame_table[square ^ 56])
+                for square in chess.SQUARES]
+            self.tables[chess.BLACK][piece_type] = [
+                -make_score(mg_value + table[square], eg_value + endgame_table[square])
+                for square in chess.SQUARES]
+        self.stack = [0]
+        self.pawn_keys = [0]
+        self.root_ply = -1
+        self.pawn_table = PawnHashTable(pawn_hash_mb)
+
+    def material_pst(self, board_state):
+        """Полный пересчёт материала и бонусов полей (упакованная оценка с точки зрения белых)"""
+        score = 0
+        for color in chess.COLORS:
+            color_tables = self.tables[color]
+            for piece_type in chess.PIECE_TYPES:
+                table = color_tables[piece_type]
+                for square in chess.scan_forward(board_state.pieces_mask(piece_type, color)):
+                    score += table[square]
+        return score
+
+    def reset(self, board_state):
+        """Синхронизирует инкрементальное состояние с позицией в корне поиска"""
+        self.stack = [self.material_pst(board_state)]
+        self.pawn_keys = [pawn_key(board_state)]
+        self.root_ply = len(board_state.move_stack)
+
+    def move_delta(self, board_state, move):
+        """Изменение материала и бонусов полей после хода (до его выполнения)"""
+        if not move:
+            return 0
+        color = board_state.turn
+        tables = self.tables[color]
+        from_square, to_square = move.from_square, move.to_square
+
+        if board_state.is_castling(move):
+            rank_base = from_square & ~7
+            if to_square > from_square:
+                king_to, rook_to = rank_base + 6, rank_base + 5
+                rook_from = to_square if board_state.chess960 else rank_base + 7
+            else:
+                king_to, rook_to = rank_base + 2, rank_base + 3
+                rook_from = to_square if board_state.chess960 else rank_base
+            return (tables[chess.KING][king_to] - tables[chess.KING][from_square] +
+                    tables[chess.ROOK][rook_to] - tables[chess.ROOK][rook_from])
+
+        piece_type = board_state.piece_type_at(from_square)
+        delta = tables[move.promotion or piece_type][to_square] - tables[piece_type][from_square]
+
+        if board_state.is_en_passant(move):
+            captured_square = to_square - 8 if color == chess.WHITE else to_square + 8
+            delta -= self.tables[not color][chess.PAWN][captured_square]
+        else:
+            captured = board_state.piece_type_at(to_square)
+            if captured:
+                delta -= self.tables[not color][captured][to_square]
+        return delta
+
+    def push(self, board_state, move):
+        self.stack.append(self.stack[-1] + self.move_delta(board_state, move))
+        self.pawn_keys.append(self.pawn_keys[-1] ^ pawn_key_delta(board_state, move))
+        board_state.push(move)
+
+    def pop(self, board_state):
+        self.stack.pop()
+        self.pawn_keys.pop()
+        return board_state.pop()
+
+    def pawn_entry(self, board_state, synced=None):
+        """(упакованная оценка пешек, проходные белых, проходные чёрных) через пешечную таблицу"""
+        if synced is None:
+            synced = len(board_state.move_stack) - self.root_ply == len(self.stack) - 1
+        key = self.pawn_keys[-1] if synced else pawn_key(board_state)
+        entry = self.pawn_table.probe(key)
+        if entry is None:
+            pawns = board_state.pawns
+            entry = pawn_structure(pawns & board_state.occupied_co[chess.WHITE],
+                                   pawns & board_state.occupied_co[chess.BLACK])
+            self.pawn_table.store(key, *entry)
+        return entry
+
+    def attacks(self, board_state, color):
+        """Маска атакованных полей и мобильность фигур (без пешек и короля)"""
+        occupied = board_state.occupied
+        own = board_state.occupied_co[color]
+        free = ~own
+        pawns = board_state.pawns & own
+        if color == chess.WHITE:
+            attacked = (((pawns & BB_NOT_FILE_A) << 7) | ((pawns & BB_NOT_FILE_H) << 9)) & chess.BB_ALL
+        else:
+            attacked = ((pawns & BB_NOT_FILE_A) >> 9) | ((pawns & BB_NOT_FILE_H) >> 7)
+
+        # Поля перебираются выделением младшего бита, без генератора scan_forward
+        mobility = 0
+        pieces = board_state.knights & own
+        while pieces:
+            bit = pieces & -pieces
+            pieces ^= bit
+            piece_attacks = KNIGHT_ATTACKS[bit.bit_length() - 1]
+            attacked |= piece_attacks
+            mobility += popcount(piece_attacks & free)
+        pieces = (board_state.bishops | board_state.queens) & own
+        while pieces:
+            bit = pieces & -pieces
+            pieces ^= bit
+            square = bit.bit_length() - 1
+            piece_attacks = DIAG_ATTACKS[square][DIAG_MASKS[square] & occupied]
+            attacked |= piece_attacks
+            mobility += popcount(piece_attacks & free)
+        pieces = (board_state.rooks | board_state.queens) & own
+        while pieces:
+            bit = pieces & -pieces
+            pieces ^= bit
+            square = bit.bit_length() - 1
+            piece_attacks = (RANK_ATTACKS[square][RANK_MASKS[square] & occupied] |
+                             FILE_ATTACKS[square][FILE_MASKS[square] & occupied])
+            attacked |= piece_attacks
+            mobility += popcount(piece_attacks & free)
+
+        king = board_state.kings & own
+        if king:
+            attacked |= KING_ATTACKS[king.bit_length() - 1]
+        return attacked, mobility
+
+    def evaluate(self, board_state):
+        """Оценка с точки зрения стороны, делающей ход"""
+        synced = len(board_state.move_stack) - self.root_ply == len(self.stack) - 1
+        packed = self.stack[-1] if synced else self.material_pst(board_state)
+        packed += self.pawn_entry(board_state, synced)[0]
+        mg, eg = unpack_score(packed)
+        phase = game_phase(board_state)
+        blended = mg * phase + eg * (TOTAL_PHASE - phase)
+        # Округление к нулю: оценка позиции и её зеркального отражения совпадает
+        score = blended // TOTAL_PHASE if blended >= 0 else -(-blended // TOTAL_PHASE)
+
+        white_attacks, white_mobility = self.attacks(board_state, chess.WHITE)
+        black_attacks, black_mobility = self.attacks(board_state, chess.BLACK)
+        score += MOBILITY_WEIGHT * (white_mobility - black_mobility)
+        score += CENTER_WEIGHT * (chess.popcount(white_attacks & BB_CENTER) -
+                                  chess.popcount(black_attacks & BB_CENTER))
+
+        # Шах: король стороны на ходу в маске атак соперника
+        if board_state.turn == chess.WHITE:
+            if black_attacks & board_state.kings & board_state.occupied_co[chess.WHITE]:
+                score -= CHECK_PENALTY
+            return score
+        if white_attacks & board_state.kings & board_state.occupied_co[chess.BLACK]:
+            score += CHECK_PENALTY
+        return -score
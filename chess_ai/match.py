@@ -0,0 +1,459 @@
+"""Матч между двумя конфигурациями движка без интерфейса
+
+Запуск:
+    python -m chess_ai.match --engine name=d3,depth=3 --engine name=d4,depth=4 --games 200
+    python -m chess_ai.match --engine difficulty=2 --engine movetime=200 \\
+        --openings openings.epd --pgn match.pgn --workers 4
+
+Параметры конфигурации (через запятую): name, difficulty, depth, movetime
+(мс на ход), nodes, tc (контроль времени «секунды+добавка»), hash (МБ TT),
+pawnhash (МБ), algorithm (pvs|minimax), quiescence, book, syzygy, probelimit.
+
+Каждый дебют играется дважды со сменой цвета. Без --openings партии
+начинаются после --random-plies случайных полуходов из начальной позиции
+(--seed повторяет набор), иначе детерминированные движки играли бы одни и
+те же партии. Партии идут параллельно в процессах, готовые партии сразу
+дописываются в PGN.
+"""
+
+import argparse
+import math
+import os
+import random
+import time
+
+import chess
+import chess.pgn
+
+
+DEFAULT_GAMES = 100
+MAX_GAME_PLIES = 400
+DRAW_ADJUDICATION_MOVE = 40
+DRAW_ADJUDICATION_SCORE = 10
+DRAW_ADJUDICATION_COUNT = 8
+RESIGN_ADJUDICATION_SCORE = 1000
+RESIGN_ADJUDICATION_COUNT = 4
+RANDOM_OPENING_PLIES = 4
+# Z-оценка для 95% доверительного интервала
+CONFIDENCE_Z = 1.959964
+
+ENGINE_OPTIONS = {
+    "hash": ("tt_size_mb", int),
+    "pawnhash": ("pawn_hash_mb", float),
+    "algorithm": ("search_algorithm", str),
+    "quiescence": ("quiescence", lambda value: value.lower() in ("1", "true", "yes", "on")),
+    "book": ("use_book", lambda value: value.lower() in ("1", "true", "yes", "on")),
+    "syzygy": ("syzygy_path", str),
+    "probelimit": ("syzygy_probe_limit", int),
+}
+SEARCH_OPTIONS = {
+    "difficulty": ("difficulty_level", int),
+    "depth": ("depth", int),
+    "movetime": ("movetime_ms", int),
+    "nodes": ("nodes", int),
+}
+
+
+class EngineConfig:
+    """Настройки одного участника: параметры конструктора и ограничения поиска"""
+
+    def __init__(self, name, engine_options=None, search_options=None, time_control=None):
+        self.name = name
+        self.engine_options = dict(engine_options or {})
+        self.engine_options.setdefault("use_book", False)
+        self.search_options = dict(search_options or {})
+        self.search_options.setdefault("difficulty_level", 4)
+        # (секунды на партию, добавка за ход в секундах) или None
+        self.time_control = time_control
+
+    @classmethod
+    def parse(cls, text, default_name):
+        """Разбирает строку вида "name=d4,depth=4,hash=16" """
+        name = default_name
+        engine_options, search_options, time_control = {}, {}, None
+        for item in filter(None, (part.strip() for part in text.split(","))):
+            key, _, value = item.partition("=")
+            key = key.strip().lower()
+            value = value.strip()
+            if key == "name":
+                name = value
+            elif key == "tc":
+                base, _, increment = value.partition("+")
+                time_control = (float(base), float(increment or 0))
+            elif key in ENGINE_OPTIONS:
+                option, convert = ENGINE_OPTIONS[key]
+                engine_options[option] = convert(value)
+            elif key in SEARCH_OPTIONS:
+                option, convert = SEARCH_OPTIONS[key]
+                search_options[option] = convert(value)
+            else:
+                raise ValueError(f"Неизвестный параметр движка: {key}")
+        return cls(name, engine_options, search_options, time_control)
+
+    def key(self):
+        """Ключ движка в процессе: у каждого участника свой движок и своя TT"""
+        return (self.name,) + tuple(sorted(self.engine_options.items()))
+
+    def __repr__(self):
+        return f"EngineConfig({self.name!r}, {self.engine_options}, {self.search_options}, {self.time_control})"
+
+
+class Adjudication:
+    """Правила досрочного присуждения результата по оценкам обоих движков"""
+
+    def __init__(self, draw_move=DRAW_ADJUDICATION_MOVE, draw_score=DRAW_ADJUDICATION_SCORE,
+                 draw_count=DRAW_ADJUDICATION_COUNT, resign_score=RESIGN_ADJUDICATION_SCORE,
+                 resign_count=RESIGN_ADJUDICATION_COUNT, max_plies=MAX_GAME_PLIES):
+        self.draw_move = draw_move
+        self.draw_score = draw_score
+        self.draw_count = draw_count
+        self.resign_score = resign_score
+        self.resign_count = resign_count
+        self.max_plies = max_plies
+
+    def check(self, board_state, scores):
+        """(результат, причина) или None; scores - оценки ходов с точки зрения белых"""
+        if len(board_state.move_stack) >= self.max_plies:
+            return "1/2-1/2", "max plies"
+        if self.resign_count and len(scores) >= 2 * self.resign_count:
+            recent = scores[-2 * self.resign_count:]
+            if all(score >= self.resign_score for score in recent):
+                return "1-0", "adjudication: black resigns"
+            if all(score <= -self.resign_score for score in recent):
+                return "0-1", "adjudication: white resigns"
+        if (self.draw_count and board_state.fullmove_number >= self.draw_move and
+                len(scores) >= 2 * self.draw_count and
+                all(abs(score) <= self.draw_score for score in scores[-2 * self.draw_count:])):
+            return "1/2-1/2", "adjudication: draw"
+        return None
+
+
+def load_openings(path, plies=None, report=print):
+    """Дебюты из EPD или PGN: список (FEN начала, [ходы в UCI])
+
+    Для PGN берутся ходы главной линии (не больше plies, если задано),
+    для EPD - сама позиция без ходов. Некорректные строки EPD и партии PGN
+    с ошибками пропускаются с сообщением в report.
+    """
+    openings = []
+    if path.lower().endswith(".pgn"):
+        with open(path, encoding="utf-8", errors="replace") as handle:
+            while True:
+                game = chess.pgn.read_game(handle)
+                if game is None:
+                    break
+                if game.errors:
+                    report(f"Пропущена партия PGN {game.headers.get('Event', '?')}: {game.errors[0]}")
+                    continue
+                moves = list(game.mainline_moves())
+                if plies is not None:
+                    moves = moves[:plies]
+                openings.append((game.board().fen(), [move.uci() for move in moves]))
+    else:
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    try:
+                        board_state, _ = chess.Board.from_epd(line)
+                    except ValueError as e:
+                        report(f"Пропущена строка EPD: {line} ({e})")
+                        continue
+                    openings.append((board_state.fen(), []))
+    return openings
+
+
+def random_openings(count, plies=RANDOM_OPENING_PLIES, seed=None):
+    """count разных дебютов из plies случайных полуходов от начальной позиции
+
+    Если столько разных дебютов нет (мало полуходов), возвращает сколько нашлось.
+    """
+    rng = random.Random(seed)
+    openings = {}
+    for _ in range(count * 100):
+        if len(openings) >= count:
+            break
+        board_state = chess.Board()
+        for _ in range(plies):
+            moves = list(board_state.legal_moves)
+            if not moves:
+                break
+            board_state.push(rng.choice(moves))
+        if not board_state.is_game_over():
+            openings.setdefault(board_state.epd(), [move.uci() for move in board_state.move_stack])
+    return [(chess.STARTING_FEN, moves) for moves in openings.values()]
+
+
+_match_engines = {}
+
+
+def _match_engine(config):
+    """Движок процесса для конфигурации; TT очищается перед каждой партией"""
+    key = config.key()
+    engine = _match_engines.get(key)
+    if engine is None:
+        # Импорт в процессе-исполнителе, чтобы главный процесс не создавал движки
+        from .engine import PurePythonAI
+
+        engine = PurePythonAI(**config.engine_options)
+        _match_engines[key] = engine
+    engine.tt.clear()
+    engine.move_orderer.clear()
+    return engine
+
+
+def play_game(index, opening_fen, opening_moves, white, black, adjudication):
+    """Играет одну партию; возвращает (номер, результат, причина, текст PGN)"""
+    board_state = chess.Board(opening_fen)
+    for uci in opening_moves:
+        board_state.push_uci(uci)
+    configs = {chess.WHITE: white, chess.BLACK: black}
+    engines = {color: _match_engine(config) for color, config in configs.items()}
+    clocks = {color: config.time_control[0] * 1000 if config.time_control else None
+              for color, config in configs.items()}
+    comments = []
+    scores = []
+    result, reason = None, None
+
+    while result is None:
+        outcome = board_state.outcome(claim_draw=True)
+        if outcome is not None:
+            result, reason = outcome.result(), outcome.termination.name.lower().replace("_", " ")
+            break
+        adjudicated = adjudication.check(board_state, scores)
+        if adjudicated is not None:
+            result, reason = adjudicated
+            break
+
+        color = board_state.turn
+        config, engine = configs[color], engines[color]
+        limits = dict(config.search_options)
+        if clocks[color] is not None:
+            limits["clock_ms"] = clocks[color]
+            limits["increment_ms"] = config.time_control[1] * 1000
+        start_time = time.perf_counter()
+        move = engine.get_best_move(board_state, **limits)
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+
+        if clocks[color] is not None:
+            clocks[color] -= elapsed_ms
+            if clocks[color] < 0:
+                result = "0-1" if color == chess.WHITE else "1-0"
+                reason = "time forfeit"
+                break
+            clocks[color] += config.time_control[1] * 1000
+        if move is None or move not in board_state.legal_moves:
+            result = "0-1" if color == chess.WHITE else "1-0"
+            reason = "illegal move"
+            break
+
+        stats = engine.stats
+        if stats.source in ("book", "fallback"):
+            # У хода из книги и запасного хода нет оценки
+            scores.append(0)
+            comments.append(stats.source)
+        else:
+            # Таблицы и постоянный кеш дают оценку не хуже поиска
+            scores.append(stats.score if color == chess.WHITE else -stats.score)
+            comment = f"{stats.score / 100:+.2f}/{stats.depth} {elapsed_ms / 1000:.2f}s"
+            comments.append(comment if stats.source == "search" else f"{comment} {stats.source}")
+        board_state.push(move)
+
+    game = chess.pgn.Game()
+    game.setup(chess.Board(opening_fen))
+    game.headers["Event"] = "PurePythonAI match"
+    game.headers["Site"] = "local"
+    game.headers["Round"] = str(index + 1)
+    game.headers["White"] = white.name
+    game.headers["Black"] = black.name
+    game.headers["Result"] = result
+    game.headers["Termination"] = reason
+    node = game
+    opening_plies = len(opening_moves)
+    for ply, move in enumerate(board_state.move_stack):
+        node = node.add_variation(move)
+        if ply == opening_plies - 1:
+            node.comment = "book"
+        elif ply >= opening_plies:
+            node.comment = comments[ply - opening_plies]
+    return index, result, reason, str(game)
+
+
+def _play_game_task(task):
+    return play_game(*task)
+
+
+class MatchResult:
+    """Счёт матча с точки зрения первого движка"""
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+        self.wins = 0
+        self.losses = 0
+        self.draws = 0
+        self.reasons = {}
+
+    @property
+    def games(self):
+        return self.wins + self.losses + self.draws
+
+    def add(self, result, first_is_white, reason):
+        if result == "1/2-1/2":
+            self.draws += 1
+        elif (result == "1-0") == first_is_white:
+            self.wins += 1
+        else:
+            self.losses += 1
+        self.reasons[reason] = self.reasons.get(reason, 0) + 1
+
+    @property
+    def score(self):
+        return (self.wins + self.draws / 2) / self.games if self.games else 0.0
+
+    def elo(self):
+        """(разница Эло, половина 95% доверительного интервала) по дисперсии результатов партий"""
+        games = self.games
+        if not games:
+            return 0.0, 0.0
+        score = self.score
+        variance = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2 +
+                    self.losses * score ** 2) / games
+        margin = CONFIDENCE_Z * math.sqrt(variance / games)
+        low, high = _elo_from_score(score - margin), _elo_from_score(score + margin)
+        return _elo_from_score(score), (high - low) / 2
+
+    def summary(self):
+        elo, error = self.elo()
+        lines = [
+            f"Score of {self.first} vs {self.second}: {self.wins} - {self.losses} - {self.draws} "
+            f"[{self.score:.3f}] {self.games}",
+            f"Elo difference: {elo:+.1f} +/- {error:.1f}",
+        ]
+        for reason, count in sorted(self.reasons.items(), key=lambda item: -item[1]):
+            lines.append(f"  {reason}: {count}")
+        return "\n".join(lines)
+
+
+def _elo_from_score(score):
+    """Разница Эло по доле набранных очков; на краях ограничена ±1000"""
+    score = min(max(score, 1e-3), 1 - 1e-3)
+    # + 0.0 превращает -0.0 при равном счёте в 0.0
+    return max(-1000.0, min(1000.0, -400 * math.log10(1 / score - 1))) + 0.0
+
+
+def match_tasks(first, second, games, openings, adjudication):
+    """Задания партий: каждый дебют дважды, во второй партии цвета меняются"""
+    openings = openings or random_openings((games + 1) // 2)
+    for index in range(games):
+        opening_fen, opening_moves = openings[(index // 2) % len(openings)]
+        white, black = (first, second) if index % 2 == 0 else (second, first)
+        yield index, opening_fen, opening_moves, white, black, adjudication
+
+
+def run_match(first, second, games=DEFAULT_GAMES, openings=None, workers=1, pgn_path=None,
+              adjudication=None, report=print):
+    """Играет матч и возвращает MatchResult
+
+    Партии распределяются по workers процессам, одновременно в работе не
+    больше 2 * workers партий, поэтому число партий не ограничено памятью.
+    Готовые партии сразу дописываются в pgn_path.
+    """
+    adjudication = adjudication or Adjudication()
+    if openings and games > 2 * len(openings):
+        report(f"Предупреждение: {games} партий на {len(openings)} дебютов - дебюты повторятся, "
+               f"а одинаковые партии занижают погрешность Elo")
+    result = MatchResult(first.name, second.name)
+    pgn_file = open(pgn_path, "a", encoding="utf-8") if pgn_path else None
+    tasks = match_tasks(first, second, games, openings, adjudication)
+
+    def record(game_result):
+        index, game_score, reason, pgn = game_result
+        result.add(game_score, index % 2 == 0, reason)
+        if pgn_file is not None:
+            pgn_file.write(pgn + "\n\n")
+            pgn_file.flush()
+        elo, error = result.elo()
+        report(f"Game {index + 1} ({first.name if index % 2 == 0 else second.name} - "
+               f"{second.name if index % 2 == 0 else first.name}): {game_score} {{{reason}}}  "
+               f"score {result.wins}-{result.losses}-{result.draws}  elo {elo:+.0f} +/- {error:.0f}")
+
+    try:
+        if workers <= 1:
+            for task in tasks:
+                record(play_game(*task))
+        else:
+            from concurrent.futures import FIRST_COMPLETED, wait
+
+            from .engine import engine_pool
+
+            with engine_pool(workers) as executor:
+                pending = set()
+                try:
+                    for task in tasks:
+                        pending.add(executor.submit(_play_game_task, task))
+                        if len(pending) >= 2 * workers:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                record(future.result())
+                    for future in wait(pending).done:
+                        record(future.result())
+                except KeyboardInterrupt:
+                    for future in pending:
+                        future.cancel()
+                    raise
+    except KeyboardInterrupt:
+        report("Матч прерван")
+    finally:
+        if pgn_file is not None:
+            pgn_file.close()
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Матч двух конфигураций PurePythonAI")
+    parser.add_argument("--engine", action="append", default=[], metavar="OPTIONS",
+                        help="конфигурация движка, например name=d4,depth=4 (дважды)")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--openings", help="дебюты в EPD или PGN")
+    parser.add_argument("--opening-plies", type=int, help="сколько полуходов брать из партий PGN")
+    parser.add_argument("--random-plies", type=int, default=RANDOM_OPENING_PLIES,
+                        help="случайных полуходов в начале партий без --openings")
+    parser.add_argument("--seed", type=int, help="зерно случайных дебютов")
+    parser.add_argument("--pgn", help="файл для партий (дописывается)")
+    parser.add_argument("--max-plies", type=int, default=MAX_GAME_PLIES)
+    parser.add_argument("--draw-move", type=int, default=DRAW_ADJUDICATION_MOVE,
+                        help="ход, с которого разрешено присуждение ничьей")
+    parser.add_argument("--draw-score", type=int, default=DRAW_ADJUDICATION_SCORE)
+    parser.add_argument("--draw-count", type=int, default=DRAW_ADJUDICATION_COUNT,
+                        help="ходов подряд с оценкой в пределах --draw-score (0 - не присуждать)")
+    parser.add_argument("--resign-score", type=int, default=RESIGN_ADJUDICATION_SCORE)
+    parser.add_argument("--resign-count", type=int, default=RESIGN_ADJUDICATION_COUNT,
+                        help="ходов подряд с оценкой за --resign-score (0 - не присуждать)")
+    args = parser.parse_args(argv)
+
+    if len(args.engine) != 2:
+        parser.error("нужно ровно две конфигурации --engine")
+    first = EngineConfig.parse(args.engine[0], "engine1")
+    second = EngineConfig.parse(args.engine[1], "engine2")
+    if first.name == second.name:
+        first.name, second.name = f"{first.name}-1", f"{second.name}-2"
+    if args.openings:
+        openings = load_openings(args.openings, args.opening_plies)
+        if not openings:
+            parser.error(f"в {args.openings} нет дебютов")
+    else:
+        openings = random_openings((args.games + 1) // 2, args.random_plies, args.seed)
+    adjudication = Adjudication(args.draw_move, args.draw_score, args.draw_count,
+                                args.resign_score, args.resign_count, args.max_plies)
+
+    start_time = time.perf_counter()
+    result = run_match(first, second, args.games, openings, args.workers, args.pgn, adjudication)
+    print()
+    print(result.summary())
+    print(f"Time: {time.perf_counter() - start_time:.0f}s")
+
+
+if __name__ == "__main__":
+    main()
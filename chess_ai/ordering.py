@@ -0,0 +1,95 @@
+"""Упорядочивание ходов для альфа-бета поиска"""
+
+import chess
+
+
+# Предел глубины от корня с учётом форсированного поиска взятий
+MAX_PLY = 128
+
+
+class MoveOrderer:
+    """Упорядочивание ходов: ход из TT/PV, взятия MVV-LVA, ходы-убийцы, история
+
+    Движок вызывает order() перед перебором ходов узла и record_cutoff() при
+    бета-отсечении. Для экспериментов можно подставить свой объект с теми же
+    методами в PurePythonAI.move_orderer.
+    """
+
+    HASH_MOVE_SCORE = 1 << 30
+    CAPTURE_SCORE = 1 << 24
+    KILLER_SCORES = (1 << 22, (1 << 22) - 1)
+    HISTORY_LIMIT = 1 << 20
+
+    def __init__(self, piece_values, max_ply=MAX_PLY):
+        self.piece_values = piece_values
+        self.max_ply = max_ply
+        self.killers = [[None, None] for _ in range(max_ply)]
+        self.history = [0] * (2 * 64 * 64)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def clear(self):
+        self.killers = [[None, None] for _ in range(self.max_ply)]
+        self.history = [0] * (2 * 64 * 64)
+        self.reset_stats()
+
+    def new_search(self):
+        """Сбрасывает ходы-убийцы и ослабляет историю прошлых поисков"""
+        self.killers = [[None, None] for _ in range(self.max_ply)]
+        self.history = [value // 2 for value in self.history]
+        self.reset_stats()
+
+    @property
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def capture_score(self, board_state, move):
+        """MVV-LVA: самая ценная жертва, затем самый дешёвый нападающий"""
+        if board_state.is_en_passant(move):
+            victim = chess.PAWN
+        else:
+            victim = board_state.piece_type_at(move.to_square)
+        attacker = board_state.piece_type_at(move.from_square)
+        return self.piece_values[victim] * 10 - self.piece_values[attacker] // 100
+
+    def order(self, board_state, moves, ply, hash_move=None):
+        killers = self.killers[ply] if ply < self.max_ply else (None, None)
+        history = self.history
+        color_offset = 4096 if board_state.turn == chess.WHITE else 0
+        scored = []
+        for move in moves:
+            if move == hash_move:
+                score = self.HASH_MOVE_SCORE
+            elif board_state.is_capture(move):
+                score = self.CAPTURE_SCORE + self.capture_score(board_state, move)
+                if move.promotion:
+                    score += self.piece_values[move.promotion]
+            elif move.promotion:
+                score = self.CAPTURE_SCORE + self.piece_values[move.promotion]
+            elif move == killers[0]:
+                score = self.KILLER_SCORES[0]
+            elif move == killers[1]:
+                score = self.KILLER_SCORES[1]
+            else:
+                score = history[color_offset + move.from_square * 64 + move.to_square]
+            scored.append((score, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def record_cutoff(self, board_state, move, ply, depth, move_index):
+        """Учитывает ход, вызвавший отсечение (вызывается до выполнения хода)"""
+        self.cutoffs += 1
+        if move_index == 0:
+            self.first_move_cutoffs += 1
+        if board_state.is_capture(move) or move.promotion:
+            return
+        if ply < self.max_ply:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        index = (4096 if board_state.turn == chess.WHITE else 0) + move.from_square * 64 + move.to_square
+        self.history[index] = min(self.history[index] + depth * depth, self.HISTORY_LIMIT)
@@ -0,0 +1,96 @@
+"""Пешечная хеш-таблица и Zobrist-ключ расположения пешек"""
+
+import chess
+import chess.polyglot
+
+
+# Ключи пешек из таблицы Polyglot: [цвет][поле]; у чёрных пешек вид 0, у белых - 1
+PAWN_ZOBRIST = [
+    [chess.polyglot.POLYGLOT_RANDOM_ARRAY[64 * int(color) + square] for square in chess.SQUARES]
+    for color in chess.COLORS
+]
+
+
+def pawn_key(board_state):
+    """Полный пересчёт Zobrist-ключа пешек позиции"""
+    key = 0
+    for color in chess.COLORS:
+        color_keys = PAWN_ZOBRIST[color]
+        for square in chess.scan_forward(board_state.pawns & board_state.occupied_co[color]):
+            key ^= color_keys[square]
+    return key
+
+
+def pawn_key_delta(board_state, move):
+    """Изменение ключа пешек после хода (до его выполнения); 0, если пешки не затронуты"""
+    if not move:
+        return 0
+    pawns = board_state.pawns
+    from_square, to_square = move.from_square, move.to_square
+    color = board_state.turn
+    delta = 0
+    if pawns & chess.BB_SQUARES[to_square]:
+        # Взятие пешки соперника
+        delta = PAWN_ZOBRIST[not color][to_square]
+    if pawns & chess.BB_SQUARES[from_square]:
+        own_keys = PAWN_ZOBRIST[color]
+        delta ^= own_keys[from_square]
+        if not move.promotion:
+            delta ^= own_keys[to_square]
+        if to_square == board_state.ep_square and (from_square ^ to_square) & 7:
+            delta ^= PAWN_ZOBRIST[not color][to_square - 8 if color == chess.WHITE else to_square + 8]
+    return delta
+
+
+class PawnHashTable:
+    """Таблица фиксированного размера: ключ пешек -> (оценка структуры, проходные белых, проходные чёрных)
+
+    Пешки двигаются редко по сравнению с фигурами, поэтому в поиске одна и
+    та же структура оценивается тысячи раз; при совпадении ключа оценка
+    берётся из таблицы. Новая запись всегда замещает старую в своём слоте.
+    """
+
+    # Стоимость заполненного слота по tracemalloc: ссылка в списке, кортеж,
+    # 64-битный ключ, оценка и маски проходных (в эндшпиле - большие целые)
+    ENTRY_SIZE = 168
+
+    def __init__(self, size_mb=1):
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """Перевыделяет таблицу под заданный объём памяти в МБ"""
+        self.size_mb = size_mb
+        self.capacity = max(1, int(size_mb * 1024 * 1024) // self.ENTRY_SIZE)
+        self.slots = [None] * self.capacity
+        self.reset_stats()
+
+    def clear(self):
+        self.slots = [None] * self.capacity
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key):
+        """Возвращает (оценка, проходные белых, проходные чёрных) или None"""
+        entry = self.slots[key % self.capacity]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:]
+        self.misses += 1
+        return None
+
+    def store(self, key, score, white_passed, black_passed):
+        self.slots[key % self.capacity] = (key, score, white_passed, black_passed)
+
+    def stats(self):
+        probes = self.hits + self.misses
+        return {
+            "size_mb": self.size_mb,
+            "capacity": self.capacity,
+            "used": sum(1 for entry in self.slots if entry is not None),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / probes if probes else 0.0,
+        }
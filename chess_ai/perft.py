@@ -0,0 +1,180 @@
+"""Perft: подсчёт листьев дерева ходов для проверки и замера генератора ходов
+
+Запуск:
+    python -m chess_ai.perft --depth 5                 # начальная позиция
+    python -m chess_ai.perft --position kiwipete --depth 4 --divide
+    python -m chess_ai.perft --suite                   # эталонные позиции
+"""
+
+import argparse
+import time
+
+import chess
+
+from .engine import engine_pool
+
+
+DEFAULT_SUITE_MAX_NODES = 1000000
+
+# Эталонные позиции и известные числа листьев для глубин 1, 2, 3...
+# (https://www.chessprogramming.org/Perft_Results)
+PERFT_POSITIONS = {
+    "startpos": (chess.STARTING_FEN,
+                 [20, 400, 8902, 197281, 4865609, 119060324]),
+    "kiwipete": ("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+                 [48, 2039, 97862, 4085603, 193690690]),
+    "position3": ("8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+                  [14, 191, 2812, 43238, 674624, 11030083]),
+    "position4": ("r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+                  [6, 264, 9467, 422333, 15833292]),
+    "position5": ("rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+                  [44, 1486, 62379, 2103487, 89941194]),
+    "position6": ("r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+                  [46, 2079, 89890, 3894594, 164075551]),
+}
+
+
+def position_key(board_state):
+    """Точный ключ позиции для хеша perft: фигуры, очередь хода, рокировки и взятие на проходе"""
+    return (board_state.pawns, board_state.knights, board_state.bishops, board_state.rooks,
+            board_state.queens, board_state.kings,
+            board_state.occupied_co[chess.WHITE], board_state.occupied_co[chess.BLACK],
+            board_state.turn, board_state.clean_castling_rights(),
+            board_state.ep_square if board_state.has_legal_en_passant() else None)
+
+
+def perft(board_state, depth, table=None, max_entries=0):
+    """Число листьев на глубине depth
+
+    На последнем полуходе листья не обходятся, а считаются через
+    legal_moves.count(). table - необязательный словарь (ключ позиции,
+    глубина) -> число листьев; в него сохраняется не больше max_entries
+    записей.
+    """
+    if depth <= 1:
+        return board_state.legal_moves.count() if depth == 1 else 1
+
+    if table is not None:
+        key = (position_key(board_state), depth)
+        count = table.get(key)
+        if count is not None:
+            return count
+
+    count = 0
+    for move in board_state.legal_moves:
+        board_state.push(move)
+        count += perft(board_state, depth - 1, table, max_entries)
+        board_state.pop()
+
+    if table is not None and len(table) < max_entries:
+        table[key] = count
+    return count
+
+
+def _perft_root_move(fen, chess960, move_uci, depth, hash_entries):
+    """Считает одно поддерево корня в процессе пула"""
+    board_state = chess.Board(fen, chess960=chess960)
+    board_state.push_uci(move_uci)
+    table = {} if hash_entries else None
+    return move_uci, perft(board_state, depth - 1, table, hash_entries)
+
+
+def divide(board_state, depth, hash_entries=0, workers=1):
+    """Число листьев для каждого хода корня: [(ход, число), ...] в порядке генерации
+
+    hash_entries > 0 включает хеш результатов; workers > 1 распределяет
+    ходы корня между процессами (у каждого процесса свой хеш).
+    """
+    depth = max(depth, 1)
+    moves = list(board_state.legal_moves)
+
+    if workers > 1 and depth > 1:
+        fen = board_state.fen()
+        with engine_pool(workers) as executor:
+            futures = [executor.submit(_perft_root_move, fen, board_state.chess960, move.uci(), depth,
+                                       hash_entries)
+                       for move in moves]
+            counts = dict(future.result() for future in futures)
+        return [(move, counts[move.uci()]) for move in moves]
+
+    table = {} if hash_entries else None
+    results = []
+    for move in moves:
+        board_state.push(move)
+        results.append((move, perft(board_state, depth - 1, table, hash_entries)))
+        board_state.pop()
+    return results
+
+
+def run_suite(max_nodes=DEFAULT_SUITE_MAX_NODES, hash_entries=0, workers=1, report=print):
+    """Проверяет эталонные позиции на всех глубинах, где ожидается не больше max_nodes листьев
+
+    Возвращает True, если все числа совпали с эталоном.
+    """
+    passed = True
+    total_nodes = 0
+    total_time = 0.0
+    for name, (fen, expected) in PERFT_POSITIONS.items():
+        for depth, count in enumerate(expected, 1):
+            if count > max_nodes:
+                break
+            start_time = time.perf_counter()
+            result = sum(nodes for _, nodes in divide(chess.Board(fen), depth, hash_entries, workers))
+            elapsed = time.perf_counter() - start_time
+            total_nodes += result
+            total_time += elapsed
+            ok = result == count
+            passed = passed and ok
+            report(f"{name:10s} depth {depth}  {result:10d} {'ok' if ok else f'FAIL (ожидалось {count})':24s}"
+                   f"{elapsed:8.2f}s {int(result / max(elapsed, 1e-6)):9d} nps")
+
+    report(f"Nodes: {total_nodes}  time: {total_time:.2f}s  nps: {int(total_nodes / max(total_time, 1e-6))}")
+    report("Все результаты совпадают с эталоном" if passed else "Есть расхождения с эталоном")
+    return passed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft для генератора ходов python-chess")
+    parser.add_argument("--fen", help="позиция в FEN (по умолчанию начальная)")
+    parser.add_argument("--position", choices=sorted(PERFT_POSITIONS), help="эталонная позиция")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--divide", action="store_true", help="показать число листьев для каждого хода")
+    parser.add_argument("--hash", type=int, default=0, metavar="ENTRIES",
+                        help="хешировать результаты, не больше ENTRIES записей")
+    parser.add_argument("--workers", type=int, default=1, help="процессов для разбиения ходов корня")
+    parser.add_argument("--suite", action="store_true", help="проверить все эталонные позиции")
+    parser.add_argument("--max-nodes", type=int, default=DEFAULT_SUITE_MAX_NODES,
+                        help="предел числа листьев для --suite")
+    args = parser.parse_args(argv)
+
+    if args.suite:
+        raise SystemExit(0 if run_suite(args.max_nodes, args.hash, args.workers) else 1)
+
+    expected = None
+    if args.position:
+        fen, counts = PERFT_POSITIONS[args.position]
+        if args.depth <= len(counts):
+            expected = counts[args.depth - 1]
+    else:
+        fen = args.fen or chess.STARTING_FEN
+    board_state = chess.Board(fen)
+
+    start_time = time.perf_counter()
+    results = divide(board_state, args.depth, args.hash, args.workers)
+    elapsed = time.perf_counter() - start_time
+    nodes = sum(count for _, count in results)
+
+    if args.divide:
+        for move, count in results:
+            print(f"{move.uci()}: {count}")
+        print()
+    print(f"Nodes searched: {nodes}")
+    print(f"Time: {elapsed:.2f}s  nps: {int(nodes / max(elapsed, 1e-6))}")
+    if expected is not None:
+        print("ok" if nodes == expected else f"FAIL: ожидалось {expected}")
+        if nodes != expected:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""Постоянный кеш результатов глубоких поисков в SQLite
+
+Кеш переживает перезапуск программы: в корне поиска движок сначала ищет
+позицию по ключу Zobrist и, если там есть результат не мельче нужной
+глубины, отвечает сразу. База открывается при первом обращении, запись идёт
+пачками в отдельном потоке, чтобы поиск не ждал диска.
+"""
+
+import atexit
+import functools
+import queue
+import sys
+import threading
+import time
+
+
+DEFAULT_MAX_ENTRIES = 200000
+DEFAULT_MAX_AGE_DAYS = 90
+DEFAULT_MIN_DEPTH = 4
+WRITE_BATCH_SIZE = 256
+WRITE_INTERVAL = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key INTEGER PRIMARY KEY,
+    depth INTEGER NOT NULL,
+    move TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    pv TEXT NOT NULL,
+    nodes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+)
+"""
+CREATE_INDEX = "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)"
+
+
+def signed_key(key):
+    """64-битный ключ Zobrist как знаковое целое: INTEGER в SQLite - знаковый int64"""
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+class PersistentCache:
+    """Результаты поиска по ключу Zobrist: (глубина, ход UCI, оценка, [PV в UCI])
+
+    Размер ограничен max_entries: лишние записи удаляются по давности
+    последнего использования (LRU). Записи, не использованные max_age_days
+    дней, удаляются при открытии базы. Из одной базы могут читать и писать
+    несколько процессов. Ошибки базы передаются в log (по умолчанию - в stderr);
+    если базу не удалось открыть, кеш отключается до конца работы.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES, max_age_days=DEFAULT_MAX_AGE_DAYS,
+                 min_depth=DEFAULT_MIN_DEPTH, log=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.min_depth = min_depth
+        self.log = log or functools.partial(print, file=sys.stderr)
+        self._connection = None
+        self._lock = threading.Lock()
+        self._writes = queue.Queue()
+        self._writer = None
+        self.disabled = False
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evicted = 0
+        self.errors = 0
+
+    def _connect(self):
+        # Импорт откладывается до первого обращения: без кеша модуль не нужен
+        import sqlite3
+
+        connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        # WAL: чтение из поиска не ждёт записи из фонового потока и других процессов
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _open(self):
+        """Открывает базу при первом обращении и запускает поток записи
+
+        Возвращает False и отключает кеш, если путь или файл базы непригодны.
+        """
+        import sqlite3
+
+        connections = []
+        try:
+            connections.append(self._connect())
+            with connections[0]:
+                connections[0].execute(SCHEMA)
+                connections[0].execute(CREATE_INDEX)
+                if self.max_age_days:
+                    cursor = connections[0].execute("DELETE FROM results WHERE last_used < ?",
+                                                    (time.time() - self.max_age_days * 86400,))
+                    self.evicted += cursor.rowcount
+            # Соединение потока записи тоже открывается здесь, чтобы ошибка не терялась в потоке
+            connections.append(self._connect())
+        except sqlite3.Error as e:
+            for connection in connections:
+                connection.close()
+            self.errors += 1
+            self.disabled = True
+            self.log(f"Кеш {self.path} отключён: {e}")
+            return False
+        self._connection = connections[0]
+        self._writer = threading.Thread(target=self._write_loop, args=(connections[1],),
+                                        name="persistent-cache", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+        return True
+
+    def lookup(self, key, min_depth=0, max_depth=None):
+        """(глубина, ход, оценка, pv) с глубиной от min_depth до max_depth или None"""
+        import sqlite3
+
+        try:
+            with self._lock:
+                if self.disabled or (self._connection is None and not self._open()):
+                    return None
+                row = self._connection.execute("SELECT depth, move, score, pv FROM results WHERE key = ?",
+                                               (signed_key(key),)).fetchone()
+        except sqlite3.Error as e:
+            self.errors += 1
+            self.log(f"Ошибка чтения кеша {self.path}: {e}")
+            return None
+        if row is None or row[0] < min_depth or (max_depth is not None and row[0] > max_depth):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._writes.put(("touch", signed_key(key), time.time()))
+        depth, move, score, pv = row
+        return depth, move, score, pv.split()
+
+    def store(self, key, depth, move, score, pv, nodes=0):
+        """Ставит результат в очередь записи; мельче min_depth не сохраняется"""
+        if depth < self.min_depth:
+            return
+        with self._lock:
+            if self.disabled or (self._connection is None and not self._open()):
+                return
+        self._writes.put(("store", signed_key(key), depth, move, score, " ".join(pv), nodes, time.time()))
+
+    def _write_loop(self, connection):
+        """Поток записи: собирает очередь в пачки и пишет их одной транзакцией"""
+        import sqlite3
+
+        running = True
+        while running:
+            batch = [self._writes.get()]
+            deadline = time.monotonic() + WRITE_INTERVAL
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    batch.append(self._writes.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            if None in batch:
+                running = False
+                batch = [item for item in batch if item is not None]
+            try:
+                self._write_batch(connection, batch)
+            except sqlite3.Error as e:
+                self.errors += 1
+                self.log(f"Ошибка записи кеша {self.path}: {e}")
+            for _ in batch:
+                self._writes.task_done()
+        connection.close()
+        self._writes.task_done()
+
+    def _write_batch(self, connection, batch):
+        stores = [item[1:] + (item[-1],) for item in batch if item[0] == "store"]
+        touches = [(used, key) for _, key, used in (item for item in batch if item[0] == "touch")]
+        with connection:
+            # Более мелкий результат не заменяет уже сохранённый глубокий
+            connection.executemany(
+                "INSERT INTO results (key, depth, move, score, pv, nodes, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET depth = excluded.depth, move = excluded.move, "
+                "score = excluded.score, pv = excluded.pv, nodes = excluded.nodes, "
+                "created = excluded.created, last_used = excluded.last_used "
+                "WHERE excluded.depth >= results.depth", stores)
+            connection.executemany("UPDATE results SET last_used = ? WHERE key = ?", touches)
+            self.stores += len(stores)
+            if stores and self.max_entries:
+                excess = connection.execute("SELECT COUNT(*) FROM results").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    connection.execute("DELETE FROM results WHERE key IN "
+                                       "(SELECT key FROM results ORDER BY last_used LIMIT ?)", (excess,))
+                    self.evicted += excess
+
+    def flush(self):
+        """Ждёт, пока поток запишет всё, что уже поставлено в очередь"""
+        if self._writer is not None:
+            self._writes.join()
+
+    def close(self):
+        """Дописывает очередь и закрывает базу; следующий запрос откроет её заново"""
+        with self._lock:
+            if self._connection is None:
+                return
+            if self._writer is not None:
+                self._writes.put(None)
+                self._writer.join()
+                self._writer = None
+            self._connection.close()
+            self._connection = None
+        atexit.unregister(self.close)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "evicted": self.evicted,
+            "errors": self.errors,
+            "disabled": self.disabled,
+        }
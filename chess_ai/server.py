@@ -0,0 +1,541 @@
+"""Локальный HTTP/WebSocket-сервер ходов и анализа на asyncio без сторонних пакетов
+
+Запуск: python -m chess_ai.server [--host 127.0.0.1] [--port 8765] [--workers N]
+
+HTTP (GET с параметрами запроса или POST с JSON):
+    /bestmove?fen=...&moves=e2e4+e7e5&depth=4&movetime=500
+    /analyse?fen=...&depth=5          полная статистика поиска и итерации
+    /stats                            счётчики кеша и очереди
+
+WebSocket /ws: клиент шлёт {"id": 1, "type": "analyse", "fen": ..., "depth": ...},
+сервер отвечает сообщениями {"id": 1, "type": "info", ...} после каждой
+итерации и {"id": 1, "type": "result", ...} в конце.
+
+Поиски идут в пуле процессов, у каждого процесса свой движок и своя TT.
+Готовые результаты хранятся в LRU-кеше по (ключ Zobrist, глубина), а
+одинаковые одновременные запросы ждут один и тот же поиск.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from urllib.parse import parse_qs, urlsplit
+
+import chess
+import chess.polyglot
+
+from .engine import DIFFICULTY_DEPTHS, MAX_SEARCH_DEPTH, engine_pool, process_engine, process_state, spawn_context
+
+
+DEFAULT_PORT = 8765
+DEFAULT_CACHE_SIZE = 100000
+DEFAULT_MAX_MOVETIME_MS = 10000
+# Запас сверх лимита времени поиска, после которого клиент получает 504
+REQUEST_TIMEOUT_GRACE = 5.0
+MAX_REQUEST_BODY = 1024 * 1024
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+                500: "Internal Server Error", 504: "Gateway Timeout"}
+
+
+class RequestError(Exception):
+    """Ошибка в запросе клиента: отдаётся с HTTP-статусом status или сообщением error"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _server_search(job_id, fen, moves, limits):
+    """Поиск в процессе пула; итерации отправляются в общую очередь с номером поиска
+
+    Итерации передаются всегда: к идущему поиску может присоединиться
+    WebSocket-клиент.
+    """
+    board_state = chess.Board(fen)
+    for uci in moves:
+        board_state.push_uci(uci)
+
+    info_queue = process_state()["info_queue"]
+
+    def send_info(info):
+        info_queue.put((job_id, {
+            "depth": info["depth"],
+            "score": info["score"],
+            "nodes": info["nodes"],
+            "nps": info["nps"],
+            "time_ms": info["time_ms"],
+            "pv": [move.uci() for move in info["pv"]],
+        }))
+
+    engine = process_engine()
+    move = engine.get_best_move(board_state, max(DIFFICULTY_DEPTHS), info_callback=send_info, **limits)
+    result = engine.stats.as_dict()
+    result["bestmove"] = move.uci() if move is not None else None
+    result.pop("profile", None)
+    return result
+
+
+def integer_param(params, name):
+    """Целое поле запроса (число JSON или строка из URL) или None, если поля нет"""
+    value = params.get(name)
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise RequestError(f"{name} должен быть числом")
+    try:
+        return int(value)
+    except (ValueError, OverflowError):
+        raise RequestError(f"{name} должен быть целым числом")
+
+
+@lru_cache(maxsize=DEFAULT_CACHE_SIZE)
+def position_key(fen, moves):
+    """Ключ Zobrist позиции после ходов moves (кортеж UCI)
+
+    Разбор FEN и вычисление ключа стоят десятки микросекунд, поэтому для
+    повторяющихся запросов ключ запоминается. Ошибки не кешируются.
+    """
+    board_state = chess.Board(fen)
+    for uci in moves:
+        board_state.push_uci(uci)
+    if board_state.is_game_over():
+        raise RequestError("позиция уже закончена")
+    return chess.polyglot.zobrist_hash(board_state)
+
+
+class SearchJob:
+    """Поиск в пуле, которого ждут один или несколько запросов"""
+
+    def __init__(self, job_id, key):
+        self.job_id = job_id
+        self.key = key
+        self.future = None
+        self.listeners = []
+
+
+class EngineServer:
+    """HTTP и WebSocket поверх пула процессов с PurePythonAI"""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, workers=1, cache_size=DEFAULT_CACHE_SIZE,
+                 max_movetime_ms=DEFAULT_MAX_MOVETIME_MS, max_depth=MAX_SEARCH_DEPTH, engine_options=None):
+        self.host = host
+        self.port = port
+        self.workers = max(1, workers)
+        self.cache_size = cache_size
+        self.max_movetime_ms = max_movetime_ms
+        self.max_depth = max_depth
+        # Без книги по умолчанию: анализу нужен поиск с вариантом, а не ход из базы
+        self.engine_options = dict({"use_book": False}, **(engine_options or {}))
+        self.cache = OrderedDict()
+        self.jobs = {}
+        self._jobs_by_id = {}
+        self._next_job_id = 0
+        self._executor = None
+        self._info_queue = None
+        self._info_thread = None
+        self._loop = None
+        self._server = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.coalesced = 0
+        self.searches = 0
+        self.timeouts = 0
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._info_queue = spawn_context().Queue()
+        self._executor = engine_pool(self.workers, self.engine_options, {"info_queue": self._info_queue})
+        self._info_thread = threading.Thread(target=self._read_info, name="server-info", daemon=True)
+        self._info_thread.start()
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        print(f"Сервер слушает http://{self.host}:{self.port} ({self.workers} процессов)")
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self._info_queue is not None:
+            self._info_queue.put(None)
+
+    def _read_info(self):
+        """Поток: переносит итерации из очереди процессов в цикл событий"""
+        while True:
+            message = self._info_queue.get()
+            if message is None:
+                return
+            self._loop.call_soon_threadsafe(self._dispatch_info, *message)
+
+    def _dispatch_info(self, job_id, info):
+        job = self._jobs_by_id.get(job_id)
+        if job is not None:
+            for listener in list(job.listeners):
+                listener(info)
+
+    # Поиск, кеш и объединение запросов
+
+    def parse_request(self, params):
+        """Позиция и ограничения из параметров: (ключ Zobrist, fen, moves, depth, movetime_ms)
+
+        Любые некорректные поля (не те типы, неверный FEN или ход) дают RequestError.
+        """
+        fen = params.get("fen") or chess.STARTING_FEN
+        if not isinstance(fen, str):
+            raise RequestError("fen должен быть строкой")
+        moves = params.get("moves") or []
+        if isinstance(moves, str):
+            moves = moves.split()
+        if not isinstance(moves, list) or not all(isinstance(uci, str) for uci in moves):
+            raise RequestError("moves должен быть строкой или списком ходов UCI")
+        moves = tuple(moves)
+        depth = integer_param(params, "depth")
+        depth = min(max(depth, 1), self.max_depth) if depth is not None else None
+        movetime = integer_param(params, "movetime")
+        try:
+            zobrist = position_key(fen, moves)
+        except (ValueError, TypeError, AttributeError, IndexError) as e:
+            raise RequestError(str(e))
+        if depth is None and movetime is None:
+            depth = DIFFICULTY_DEPTHS[max(DIFFICULTY_DEPTHS)]
+        # Лимит времени действует на любой запрос, даже с явной глубиной
+        movetime = min(max(movetime or self.max_movetime_ms, 1), self.max_movetime_ms)
+        return zobrist, fen, moves, depth, movetime
+
+    def _cache_get(self, key):
+        result = self.cache.get(key)
+        if result is None:
+            self.cache_misses += 1
+            return None
+        self.cache.move_to_end(key)
+        self.cache_hits += 1
+        return result
+
+    def _cache_put(self, key, result):
+        self.cache[key] = result
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    async def search(self, params, listener=None):
+        """Результат поиска для параметров запроса: (словарь результата, взят ли он из кеша)
+
+        Запрос с глубиной сначала ищется в кеше по (ключ Zobrist, глубина).
+        Если такой же поиск уже идёт, запрос присоединяется к нему.
+        """
+        zobrist, fen, moves, depth, movetime = self.parse_request(params)
+        if depth is not None:
+            result = self._cache_get((zobrist, depth))
+            if result is not None:
+                return result, True
+
+        job_key = (zobrist, depth, movetime)
+        job = self.jobs.get(job_key)
+        if job is None:
+            job = self._submit(job_key, fen, moves, depth, movetime)
+        else:
+            self.coalesced += 1
+        if listener is not None:
+            job.listeners.append(listener)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(job.future),
+                                            movetime / 1000 + REQUEST_TIMEOUT_GRACE)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            if listener is not None and listener in job.listeners:
+                job.listeners.remove(listener)
+        return result, False
+
+    def _submit(self, job_key, fen, moves, depth, movetime):
+        self._next_job_id += 1
+        job = SearchJob(self._next_job_id, job_key)
+        limits = {"movetime_ms": movetime}
+        if depth is not None:
+            limits["depth"] = depth
+        job.future = asyncio.wrap_future(self._executor.submit(_server_search, job.job_id, fen, moves, limits))
+        self.jobs[job_key] = job
+        self._jobs_by_id[job.job_id] = job
+        self.searches += 1
+
+        def finished(future):
+            self.jobs.pop(job_key, None)
+            self._jobs_by_id.pop(job.job_id, None)
+            if future.cancelled() or future.exception() is not None:
+                return
+            result = future.result()
+            zobrist = job_key[0]
+            if result["source"] == "search":
+                self._cache_put((zobrist, result["depth"]), result)
+            if depth is not None and (result["source"] != "search" or result["depth"] >= depth):
+                self._cache_put((zobrist, depth), result)
+
+        job.future.add_done_callback(finished)
+        return job
+
+    def stats(self):
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "cache_entries": len(self.cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "cache_hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "searches": self.searches,
+            "in_flight": len(self.jobs),
+            "timeouts": self.timeouts,
+            "workers": self.workers,
+        }
+
+    @staticmethod
+    def bestmove_response(result, cached):
+        return {
+            "bestmove": result["bestmove"],
+            "score": result["score"],
+            "depth": result["depth"],
+            "pv": result["pv"],
+            "source": result["source"],
+            "cached": cached,
+        }
+
+    # HTTP
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except RequestError as e:
+                    # Тело не прочитано, поэтому соединение дальше не годится
+                    self._send_json(writer, e.status, {"error": str(e)}, False)
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, target, headers, body = request
+                path = urlsplit(target).path
+                if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    await self._websocket(reader, writer, headers)
+                    break
+                status, payload = await self._route(method, target, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                self._send_json(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader):
+        """(метод, путь, заголовки, тело) или None при закрытом соединении"""
+        line = await reader.readline()
+        if not line:
+            return None
+        parts = line.decode("latin-1").split()
+        if len(parts) < 2:
+            return None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise RequestError("некорректный Content-Length")
+        if length < 0:
+            raise RequestError("некорректный Content-Length")
+        if length > MAX_REQUEST_BODY:
+            raise RequestError(f"тело запроса больше {MAX_REQUEST_BODY} байт", 413)
+        body = await reader.readexactly(length) if length else b""
+        return parts[0].upper(), parts[1], headers, body
+
+    async def _route(self, method, target, body):
+        url = urlsplit(target)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if method == "POST" and body:
+            try:
+                request = json.loads(body)
+            except ValueError:
+                return 400, {"error": "тело запроса должно быть JSON"}
+            if not isinstance(request, dict):
+                return 400, {"error": "тело запроса должно быть объектом JSON"}
+            params.update(request)
+
+        try:
+            if url.path == "/bestmove":
+                result, cached = await self.search(params)
+                return 200, self.bestmove_response(result, cached)
+            if url.path == "/analyse":
+                result, cached = await self.search(params)
+                return 200, dict(result, cached=cached)
+            if url.path == "/stats":
+                return 200, self.stats()
+        except RequestError as e:
+            return e.status, {"error": str(e)}
+        except asyncio.TimeoutError:
+            return 504, {"error": "превышен лимит времени"}
+        except Exception as e:
+            return 500, {"error": str(e)}
+        return 404, {"error": f"неизвестный путь {url.path}"}
+
+    @staticmethod
+    def _send_json(writer, status, payload, keep_alive):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        writer.write((f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                      f"Content-Type: application/json; charset=utf-8\r\n"
+                      f"Content-Length: {len(body)}\r\n"
+                      f"Access-Control-Allow-Origin: *\r\n"
+                      f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode() + body)
+
+    # WebSocket (RFC 6455)
+
+    async def _websocket(self, reader, writer, headers):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            self._send_json(writer, 400, {"error": "нет Sec-WebSocket-Key"}, False)
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\n"
+                      "Connection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        await writer.drain()
+
+        tasks = set()
+        try:
+            while True:
+                message = await self._read_message(reader, writer)
+                if message is None:
+                    break
+                task = asyncio.ensure_future(self._websocket_request(writer, message))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _websocket_request(self, writer, message):
+        try:
+            request = json.loads(message)
+        except ValueError:
+            self._send_frame(writer, json.dumps({"type": "error", "error": "сообщение должно быть JSON"}))
+            return
+        if not isinstance(request, dict):
+            self._send_frame(writer, json.dumps({"type": "error", "error": "сообщение должно быть объектом JSON"}))
+            return
+        request_id = request.get("id")
+
+        def send(message_type, payload):
+            self._send_frame(writer, json.dumps(dict(payload, id=request_id, type=message_type),
+                                                ensure_ascii=False))
+
+        try:
+            if request.get("type") == "stats":
+                send("stats", self.stats())
+                return
+            result, cached = await self.search(request, lambda info: send("info", info))
+            if request.get("type") == "bestmove":
+                send("result", self.bestmove_response(result, cached))
+            else:
+                send("result", dict(result, cached=cached))
+        except RequestError as e:
+            send("error", {"error": str(e)})
+        except asyncio.TimeoutError:
+            send("error", {"error": "превышен лимит времени"})
+        except ConnectionError:
+            pass
+        except Exception as e:
+            send("error", {"error": str(e)})
+
+    @staticmethod
+    async def _read_message(reader, writer):
+        """Текст следующего сообщения (склеивая фрагменты) или None после close"""
+        fragments = []
+        while True:
+            header = await reader.readexactly(2)
+            final, opcode = header[0] & 0x80, header[0] & 0x0F
+            masked, length = header[1] & 0x80, header[1] & 0x7F
+            if length == 126:
+                length = struct.unpack("!H", await reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack("!Q", await reader.readexactly(8))[0]
+            if length > MAX_REQUEST_BODY:
+                return None
+            mask = await reader.readexactly(4) if masked else b"\0\0\0\0"
+            payload = bytearray(await reader.readexactly(length))
+            for index in range(length):
+                payload[index] ^= mask[index & 3]
+
+            if opcode == 0x8:
+                EngineServer._send_frame(writer, bytes(payload[:2]), opcode=0x8)
+                return None
+            if opcode == 0x9:
+                EngineServer._send_frame(writer, bytes(payload), opcode=0xA)
+                continue
+            if opcode == 0xA:
+                continue
+            fragments.append(bytes(payload))
+            if final:
+                return b"".join(fragments).decode("utf-8")
+
+    @staticmethod
+    def _send_frame(writer, data, opcode=0x1):
+        if isinstance(data, str):
+            data = data.encode()
+        length = len(data)
+        if length < 126:
+            header = struct.pack("!BB", 0x80 | opcode, length)
+        elif length < 65536:
+            header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+        else:
+            header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+        if not writer.is_closing():
+            writer.write(header + data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP/WebSocket-сервер PurePythonAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE, help="записей в LRU-кеше")
+    parser.add_argument("--max-movetime", type=int, default=DEFAULT_MAX_MOVETIME_MS,
+                        help="наибольшее время на запрос в мс")
+    parser.add_argument("--hash", type=int, default=64, help="размер TT каждого процесса в МБ")
+    parser.add_argument("--book", action="store_true", help="отвечать ходами из книги дебютов")
+    args = parser.parse_args(argv)
+
+    server = EngineServer(args.host, args.port, args.workers, args.cache_size, args.max_movetime,
+                          engine_options={"tt_size_mb": args.hash, "use_book": args.book})
+    start_time = time.time()
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print(f"Сервер остановлен после {time.time() - start_time:.0f}s: {server.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""Статистика поиска и профилировщики, включаемые на один поиск"""
+
+import sys
+import threading
+from collections import Counter
+
+
+SAMPLE_INTERVAL = 0.001
+PROFILE_REPORT_LINES = 25
+
+
+class SearchStats:
+    """Сведения об одном вызове get_best_move
+
+    Во время поиска объект доступен как PurePythonAI.stats и пополняется
+    после каждой итерации, поэтому интерфейсы могут читать его из другого
+    потока. В параллельном режиме отсечения и попадания в пешечную таблицу
+    считаются только в главном процессе, а узлы - суммарно по всем.
+    """
+
+    def __init__(self):
+        self.move = None
+        self.source = "search"
+        self.score = 0
+        self.depth = 0
+        self.pv = []
+        self.nodes = 0
+        self.qnodes = 0
+        self.time_ms = 0.0
+        self.iterations = []
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.tt_hits = 0
+        self.tt_probes = 0
+        self.pawn_hits = 0
+        self.pawn_probes = 0
+        self.tb_hits = 0
+        self.profile = None
+
+    @property
+    def nps(self):
+        return int(self.nodes * 1000 / self.time_ms) if self.time_ms > 0 else 0
+
+    @property
+    def tt_hit_rate(self):
+        return self.tt_hits / self.tt_probes if self.tt_probes else 0.0
+
+    @property
+    def pawn_hit_rate(self):
+        return self.pawn_hits / self.pawn_probes if self.pawn_probes else 0.0
+
+    @property
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def add_iteration(self, depth, nodes, time_ms, score, pv):
+        """Итерация углубления; time_ms - время от начала поиска"""
+        previous = self.iterations[-1] if self.iterations else None
+        self.iterations.append({
+            "depth": depth,
+            "nodes": nodes,
+            "time_ms": round(time_ms, 1),
+            "iteration_ms": round(time_ms - (previous["time_ms"] if previous else 0.0), 1),
+            "score": score,
+            "pv": [move.uci() for move in pv],
+        })
+
+    def as_dict(self):
+        return {
+            "move": self.move.uci() if self.move is not None else None,
+            "source": self.source,
+            "score": self.score,
+            "depth": self.depth,
+            "pv": [move.uci() for move in self.pv],
+            "nodes": self.nodes,
+            "qnodes": self.qnodes,
+            "time_ms": round(self.time_ms, 1),
+            "nps": self.nps,
+            "cutoffs": self.cutoffs,
+            "first_move_cutoff_rate": round(self.first_move_cutoff_rate, 4),
+            "tt_hits": self.tt_hits,
+            "tt_probes": self.tt_probes,
+            "tt_hit_rate": round(self.tt_hit_rate, 4),
+            "pawn_hits": self.pawn_hits,
+            "pawn_probes": self.pawn_probes,
+            "pawn_hit_rate": round(self.pawn_hit_rate, 4),
+            "tb_hits": self.tb_hits,
+            "iterations": list(self.iterations),
+            "profile": self.profile,
+        }
+
+    def summary(self):
+        if self.source != "search":
+            return f"{self.source}: {self.move.uci() if self.move else '-'}"
+        tablebase = f", таблицы {self.tb_hits}" if self.tb_hits else ""
+        return (f"глубина {self.depth}, оценка {self.score}, узлов {self.nodes} (q {self.qnodes}), "
+                f"{self.nps} узл/с, {self.time_ms:.0f} мс, TT {self.tt_hit_rate:.0%}, "
+                f"пешки {self.pawn_hit_rate:.0%}{tablebase}, "
+                f"отсечений {self.cutoffs} ({self.first_move_cutoff_rate:.0%} первым ходом)")
+
+
+class CProfileHook:
+    """Детерминированный профиль cProfile на время одного поиска"""
+
+    def __init__(self):
+        import cProfile
+
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def report(self, limit=PROFILE_REPORT_LINES):
+        import io
+        import pstats
+
+        stream = io.StringIO()
+        pstats.Stats(self._profile, stream=stream).sort_stats("cumulative").print_stats(limit)
+        return stream.getvalue()
+
+
+class SamplingProfiler:
+    """Статистический профилировщик: раз в interval секунд снимает стек потока,
+    вызвавшего start()
+
+    Замедляет поиск заметно меньше cProfile, поэтому годится для замеров
+    времени на реальных лимитах.
+    """
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples = 0
+        self.own = Counter()
+        self.total = Counter()
+        self._thread_id = None
+        self._stopped = threading.Event()
+        self._sampler = None
+
+    def start(self):
+        self._thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._sampler = threading.Thread(target=self._run, name="search-sampler", daemon=True)
+        self._sampler.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.own[self._label(frame)] += 1
+            seen = set()
+            while frame is not None:
+                label = self._label(frame)
+                if label not in seen:
+                    seen.add(label)
+                    self.total[label] += 1
+                frame = frame.f_back
+
+    @staticmethod
+    def _label(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})"
+
+    def report(self, limit=PROFILE_REPORT_LINES):
+        if not self.samples:
+            return "Нет отсчётов"
+        lines = [f"Отсчётов: {self.samples} (каждые {self.interval * 1000:.1f} мс)",
+                 f"{'собств.':>8} {'всего':>8}  функция"]
+        for label, count in self.own.most_common(limit):
+            lines.append(f"{count / self.samples:8.1%} {self.total[label] / self.samples:8.1%}  {label}")
+        return "\n".join(lines)
+
+
+def make_profiler(kind):
+    """Профилировщик по имени: None, "cprofile" или "sample" """
+    if kind is None:
+        return None
+    if kind == "cprofile":
+        return CProfileHook()
+    if kind == "sample":
+        return SamplingProfiler()
+    raise ValueError(f"Неизвестный профилировщик: {kind}")
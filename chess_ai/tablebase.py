@@ -0,0 +1,175 @@
+"""Эндшпильные таблицы Syzygy: WDL в поиске и DTZ в корне
+
+Таблицы необязательны: файлы открываются при первом запросе, а если каталог
+не найден или в нём нет таблиц, движок просто ищет как обычно.
+"""
+
+import functools
+import os
+import sys
+
+import chess
+
+
+DEFAULT_PROBE_LIMIT = 5
+DEFAULT_CACHE_SIZE = 65536
+# Выигрыш по таблицам: выше любой оценки, но ниже матовых оценок
+TABLEBASE_WIN_SCORE = 20000
+
+
+class SyzygyTablebase:
+    """Ленивый доступ к таблицам Syzygy с кешем результатов WDL
+
+    paths - каталог или несколько каталогов через os.pathsep (как в опции
+    UCI SyzygyPath). Таблицы запрашиваются только для позиций не больше
+    чем с probe_limit фигурами (вместе с королями и пешками) и без права
+    рокировки. Сообщения об открытии таблиц передаются в log (по умолчанию -
+    в stderr).
+    """
+
+    def __init__(self, paths, probe_limit=DEFAULT_PROBE_LIMIT, cache_size=DEFAULT_CACHE_SIZE, log=None):
+        if isinstance(paths, str):
+            paths = [path for path in paths.split(os.pathsep) if path]
+        self.paths = list(paths)
+        self.probe_limit = probe_limit
+        self.cache_size = max(1, cache_size)
+        self.max_pieces = 0
+        self._tablebase = None
+        self._opened = False
+        self.cache = [None] * self.cache_size
+        self.log = log or functools.partial(print, file=sys.stderr)
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.cache_hits = 0
+        self.failures = 0
+        self.root_probes = 0
+
+    def _open(self):
+        """Открывает каталоги при первом запросе; без таблиц объект остаётся выключенным"""
+        self._opened = True
+        # Импорт откладывается: без таблиц модуль не нужен
+        import chess.syzygy
+
+        tablebase = chess.syzygy.Tablebase()
+        found = 0
+        for path in self.paths:
+            try:
+                found += tablebase.add_directory(path)
+            except OSError as e:
+                self.log(f"Каталог таблиц Syzygy недоступен: {path} ({e})")
+        if not found:
+            tablebase.close()
+            return
+        self._tablebase = tablebase
+        # Имя таблицы вида KQvKR: фигур на одну меньше длины имени
+        self.max_pieces = max(len(name) - 1 for name in tablebase.wdl)
+        self.log(f"Таблицы Syzygy: {found} файлов, до {self.max_pieces} фигур")
+
+    @property
+    def limit(self):
+        """Наибольшее число фигур, для которого выполняются запросы"""
+        if not self._opened:
+            self._open()
+        return min(self.probe_limit, self.max_pieces) if self._tablebase is not None else 0
+
+    def can_probe(self, board_state):
+        return (chess.popcount(board_state.occupied) <= self.limit and
+                not board_state.castling_rights)
+
+    def probe_wdl(self, board_state, key):
+        """WDL для стороны на ходу (-2..2) или None; key - Zobrist-ключ позиции для кеша
+
+        Результат не учитывает счётчик 50 ходов, поэтому поиск запрашивает
+        таблицы только сразу после взятия или хода пешкой.
+        """
+        self.probes += 1
+        index = key % self.cache_size
+        entry = self.cache[index]
+        if entry is not None and entry[0] == key:
+            self.cache_hits += 1
+            wdl = entry[1]
+        else:
+            wdl = self._tablebase.get_wdl(board_state)
+            self.cache[index] = (key, wdl)
+        if wdl is None:
+            self.failures += 1
+        else:
+            self.hits += 1
+        return wdl
+
+    def root_move(self, board_state):
+        """Ход, оптимальный по DTZ, и его оценка: (ход, оценка, DTZ) или None
+
+        Выигрыш реализуется кратчайшим путём к обнулению счётчика 50 ходов,
+        проигрыш затягивается как можно дольше. Выигрыш, который не успевает
+        до правила 50 ходов, ценится выше ничьей, но ниже настоящего выигрыша.
+        """
+        if not self.can_probe(board_state):
+            return None
+        self.root_probes += 1
+        clock = board_state.halfmove_clock
+        best = None
+        for move in board_state.legal_moves:
+            zeroing = board_state.is_zeroing(move)
+            board_state.push(move)
+            try:
+                if board_state.is_checkmate():
+                    rank, dtz = (5, 0), 1
+                else:
+                    wdl = self._tablebase.get_wdl(board_state)
+                    child_dtz = self._tablebase.get_dtz(board_state)
+                    if wdl is None or child_dtz is None:
+                        self.failures += 1
+                        return None
+                    wdl = -wdl
+                    # Полуходов до обнуления счётчика с нашей стороны
+                    if zeroing or wdl == 0:
+                        dtz = (wdl > 0) - (wdl < 0)
+                    else:
+                        dtz = -child_dtz + (1 if child_dtz < 0 else -1)
+                    rank = self._rank(wdl, dtz, 0 if zeroing else clock)
+            finally:
+                board_state.pop()
+            if best is None or rank > best[0]:
+                best = (rank, move, dtz)
+
+        if best is None:
+            return None
+        (outcome, _), move, dtz = best
+        score = {5: TABLEBASE_WIN_SCORE, 4: TABLEBASE_WIN_SCORE - abs(dtz), 3: 1, 2: 0, 1: -1,
+                 0: -TABLEBASE_WIN_SCORE + abs(dtz)}[outcome]
+        return move, score, dtz
+
+    @staticmethod
+    def _rank(wdl, dtz, clock):
+        """Ключ сравнения ходов корня: (исход с учётом правила 50 ходов, порядок внутри исхода)"""
+        if wdl > 0:
+            if wdl == 2 and dtz + clock <= 100:
+                return 4, -dtz
+            return 3, -dtz
+        if wdl < 0:
+            if wdl == -2 and -dtz + clock <= 100:
+                return 0, -dtz
+            return 1, -dtz
+        return 2, 0
+
+    def close(self):
+        if self._tablebase is not None:
+            self._tablebase.close()
+            self._tablebase = None
+        self._opened = False
+
+    def stats(self):
+        return {
+            "paths": self.paths,
+            "max_pieces": self.max_pieces,
+            "probe_limit": self.probe_limit,
+            "probes": self.probes,
+            "hits": self.hits,
+            "cache_hits": self.cache_hits,
+            "failures": self.failures,
+            "root_probes": self.root_probes,
+        }
@@ -0,0 +1,105 @@
+"""Таблица транспозиций движка"""
+
+
+TT_EXACT, TT_LOWER, TT_UPPER = 0, 1, 2
+
+# Общие объекты ходов для всех записей: chess.Move со своим __dict__ в каждой
+# записи стоил бы больше самой записи
+_MOVES = {}
+
+
+def shared_move(move):
+    """Один и тот же объект для одинаковых ходов"""
+    key = move.from_square | move.to_square << 6 | (move.promotion or 0) << 12
+    shared = _MOVES.get(key)
+    if shared is None:
+        shared = _MOVES[key] = move
+    return shared
+
+
+class TranspositionTable:
+    """Таблица транспозиций фиксированного размера с политикой замещения"""
+
+    # Стоимость заполненного слота по tracemalloc: ссылка в списке, кортеж из
+    # шести элементов, 64-битный ключ и оценка (ход - общий объект)
+    ENTRY_SIZE = 176
+
+    def __init__(self, size_mb=64, policy="depth"):
+        if policy not in ("depth", "always"):
+            raise ValueError(f"Неизвестная политика замещения: {policy}")
+        self.policy = policy
+        self.generation = 0
+        self.resize(size_mb)
+
+    def resize(self, size_mb):
+        """Перевыделяет таблицу под заданный объём памяти в МБ"""
+        self.size_mb = size_mb
+        self.capacity = max(1, int(size_mb * 1024 * 1024) // self.ENTRY_SIZE)
+        self.slots = [None] * self.capacity
+        self.reset_stats()
+
+    def clear(self):
+        self.slots = [None] * self.capacity
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """Помечает записи прошлых поисков как устаревшие для замещения"""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def best_move(self, key):
+        """Ход из записи без учёта в статистике (для восстановления PV)"""
+        entry = self.slots[key % self.capacity]
+        if entry is not None and entry[0] == key:
+            return entry[4]
+        return None
+
+    def probe(self, key):
+        """Возвращает (depth, score, flag, move) или None"""
+        entry = self.slots[key % self.capacity]
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != key:
+            self.misses += 1
+            self.collisions += 1
+            return None
+        self.hits += 1
+        return entry[1], entry[2], entry[3], entry[4]
+
+    def store(self, key, depth, score, flag, move):
+        index = key % self.capacity
+        old = self.slots[index]
+        if old is not None and self.policy == "depth":
+            # Глубокие записи текущего поиска не вытесняются более мелкими
+            if old[5] == self.generation and depth < old[1]:
+                if old[0] == key and old[4] is None and move is not None:
+                    self.slots[index] = old[:4] + (shared_move(move), old[5])
+                return
+        if old is not None and old[0] != key:
+            self.overwrites += 1
+        self.stores += 1
+        if move is not None:
+            move = shared_move(move)
+        self.slots[index] = (key, depth, score, flag, move, self.generation)
+
+    def stats(self):
+        probes = self.hits + self.misses
+        used = sum(1 for entry in self.slots if entry is not None)
+        return {
+            "size_mb": self.size_mb,
+            "capacity": self.capacity,
+            "used": used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "hit_rate": self.hits / probes if probes else 0.0,
+        }
@@ -0,0 +1,256 @@
+"""UCI-интерфейс движка
+
+Запуск: python -m chess_ai.uci
+"""
+
+import sys
+import threading
+
+import chess
+
+from .bench import BENCH_POSITIONS, DEFAULT_BENCH_DEPTH, format_result, format_summary, run_bench
+from .engine import DIFFICULTY_DEPTHS, MATE_BOUND, MATE_SCORE, PurePythonAI
+from .perft import divide
+from .tablebase import DEFAULT_PROBE_LIMIT
+
+
+ENGINE_NAME = "PurePythonAI"
+ENGINE_AUTHOR = "chess_fp"
+MAX_HASH_MB = 4096
+MAX_THREADS = 128
+
+
+def format_score(score):
+    """Оценка в формате UCI: cp N или mate N (в ходах, а не полуходах)"""
+    if score >= MATE_BOUND:
+        return f"mate {(MATE_SCORE - score + 1) // 2}"
+    if score <= -MATE_BOUND:
+        return f"mate -{(MATE_SCORE + score) // 2}"
+    return f"cp {score}"
+
+
+def format_info(info):
+    line = (f"info depth {info['depth']} score {format_score(info['score'])} "
+            f"nodes {info['nodes']} nps {info['nps']} time {info['time_ms']}")
+    if info["pv"]:
+        line += " pv " + " ".join(move.uci() for move in info["pv"])
+    return line
+
+
+class UciProtocol:
+    """Разбор команд UCI; поиск идёт в отдельном потоке, чтобы stop обрабатывался сразу"""
+
+    def __init__(self, engine=None, output=None):
+        self.engine = engine or PurePythonAI()
+        self.engine.log = self.send_log
+        self.output = output or sys.stdout
+        self.board = chess.Board()
+        self.skill = max(DIFFICULTY_DEPTHS)
+        tablebase = self.engine.tablebase
+        self.syzygy_path = tablebase.paths if tablebase is not None else None
+        self.syzygy_probe_limit = tablebase.probe_limit if tablebase is not None else DEFAULT_PROBE_LIMIT
+        self._search_thread = None
+        self._stop_signal = threading.Event()
+        self._output_lock = threading.Lock()
+
+    def send(self, line):
+        with self._output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def send_log(self, message):
+        """Сообщения движка (книги, таблицы, кеш) идут в протокол как info string"""
+        self.send(f"info string {message}")
+
+    def handle(self, line):
+        """Выполняет одну команду; возвращает False после quit"""
+        tokens = line.split()
+        if not tokens:
+            return True
+        handler = getattr(self, f"cmd_{tokens[0]}", None)
+        if handler is None:
+            return True
+        return handler(tokens[1:]) is not False
+
+    def run(self, stream=None):
+        for line in stream or sys.stdin:
+            if not self.handle(line.strip()):
+                break
+        self.cmd_stop([])
+        self.engine.shutdown()
+
+    def cmd_uci(self, args):
+        self.send(f"id name {ENGINE_NAME}")
+        self.send(f"id author {ENGINE_AUTHOR}")
+        self.send(f"option name Hash type spin default {self.engine.tt.size_mb} min 1 max {MAX_HASH_MB}")
+        self.send(f"option name Threads type spin default {self.engine.workers} min 1 max {MAX_THREADS}")
+        self.send(f"option name Skill type spin default {self.skill} "
+                  f"min {min(DIFFICULTY_DEPTHS)} max {max(DIFFICULTY_DEPTHS)}")
+        self.send(f"option name OwnBook type check default {'true' if self.engine.use_book else 'false'}")
+        self.send("option name Ponder type check default false")
+        self.send("option name SyzygyPath type string default <empty>")
+        self.send(f"option name SyzygyProbeLimit type spin default {DEFAULT_PROBE_LIMIT} min 0 max 7")
+        self.send("uciok")
+
+    def cmd_isready(self, args):
+        self.send("readyok")
+
+    def cmd_ucinewgame(self, args):
+        self.cmd_stop([])
+        self.engine.tt.clear()
+        self.engine.move_orderer.clear()
+        self.board = chess.Board()
+
+    def cmd_setoption(self, args):
+        if "name" not in args:
+            return
+        name_end = args.index("value") if "value" in args else len(args)
+        name = " ".join(args[args.index("name") + 1:name_end]).lower()
+        value = " ".join(args[name_end + 1:])
+
+        self.cmd_stop([])
+        try:
+            if name == "hash":
+                self.engine.set_hash(min(max(int(value), 1), MAX_HASH_MB))
+            elif name == "threads":
+                self.engine.set_workers(min(max(int(value), 1), MAX_THREADS))
+            elif name == "skill":
+                self.skill = min(max(int(value), min(DIFFICULTY_DEPTHS)), max(DIFFICULTY_DEPTHS))
+            elif name == "ownbook":
+                self.engine.use_book = value.lower() == "true"
+            elif name == "syzygypath":
+                self.syzygy_path = None if value in ("", "<empty>") else value
+                self.engine.set_tablebase(self.syzygy_path, self.syzygy_probe_limit)
+            elif name == "syzygyprobelimit":
+                self.syzygy_probe_limit = min(max(int(value), 0), 7)
+                self.engine.set_tablebase(self.syzygy_path, self.syzygy_probe_limit)
+        except ValueError:
+            self.send(f"info string invalid value for {name}: {value}")
+
+    def cmd_position(self, args):
+        if not args:
+            return
+        moves = []
+        if "moves" in args:
+            moves = args[args.index("moves") + 1:]
+            args = args[:args.index("moves")]
+        try:
+            if args[0] == "startpos":
+                board = chess.Board()
+            elif args[0] == "fen":
+                board = chess.Board(" ".join(args[1:]))
+            else:
+                return
+            for uci in moves:
+                board.push_uci(uci)
+        except ValueError as e:
+            self.send(f"info string invalid position: {e}")
+            return
+        self.board = board
+
+    def cmd_go(self, args):
+        self.cmd_stop([])
+        if args[:1] == ["perft"]:
+            self.go_perft(args[1:])
+            return
+
+        limits = {}
+        infinite = "infinite" in args
+        values = {}
+        for name in ("depth", "movetime", "wtime", "btime", "winc", "binc", "movestogo", "nodes"):
+            if name in args:
+                try:
+                    values[name] = int(args[args.index(name) + 1])
+                except (IndexError, ValueError):
+                    pass
+
+        if "depth" in values:
+            limits["depth"] = max(values["depth"], 1)
+        if "nodes" in values:
+            limits["nodes"] = max(values["nodes"], 1)
+        if "movetime" in values:
+            limits["movetime_ms"] = values["movetime"]
+        clock, increment = ("wtime", "winc") if self.board.turn == chess.WHITE else ("btime", "binc")
+        if clock in values:
+            limits["clock_ms"] = values[clock]
+            limits["increment_ms"] = values.get(increment, 0)
+            limits["moves_to_go"] = values.get("movestogo")
+        limits["infinite"] = infinite
+        limits["ponder"] = "ponder" in args
+
+        self._stop_signal.clear()
+        self._search_thread = threading.Thread(target=self._search, args=(self.board.copy(), limits),
+                                               daemon=True)
+        self._search_thread.start()
+
+    def go_perft(self, args):
+        """go perft N: число листьев по ходам корня, как в других движках"""
+        try:
+            depth = max(int(args[0]), 1)
+        except (IndexError, ValueError):
+            depth = 1
+        results = divide(self.board.copy(), depth, workers=self.engine.workers)
+        for move, count in results:
+            self.send(f"{move.uci()}: {count}")
+        self.send("")
+        self.send(f"Nodes searched: {sum(count for _, count in results)}")
+
+    def _search(self, board, limits):
+        move = self.engine.get_best_move(board, self.skill, info_callback=self._send_info, **limits)
+        if limits["infinite"]:
+            # В режиме infinite bestmove отправляется только после stop
+            self._stop_signal.wait()
+
+        if move is None:
+            self.send("bestmove 0000")
+            return
+        line = f"bestmove {move.uci()}"
+        pv = self.engine.pv
+        if len(pv) >= 2 and pv[0] == move:
+            line += f" ponder {pv[1].uci()}"
+        self.send(line)
+
+    def _send_info(self, info):
+        self.send(format_info(info))
+
+    def cmd_ponderhit(self, args):
+        """Соперник сыграл ожидаемый ход: ponder-поиск продолжается с лимитами из go"""
+        if self._search_thread is not None and self._search_thread.is_alive():
+            self.engine.ponderhit()
+
+    def cmd_stop(self, args):
+        thread = self._search_thread
+        if thread is None:
+            return
+        if thread.is_alive():
+            self.engine.stop()
+            self._stop_signal.set()
+            thread.join()
+        self._search_thread = None
+        self.engine.stop_requested = False
+
+    def cmd_bench(self, args):
+        """Нестандартная команда: бенчмарк на фиксированном наборе позиций (bench [глубина])"""
+        self.cmd_stop([])
+        try:
+            depth = int(args[0]) if args else DEFAULT_BENCH_DEPTH
+        except ValueError:
+            depth = DEFAULT_BENCH_DEPTH
+
+        def progress(index, name, result):
+            self.send("info string " + format_result(index, len(BENCH_POSITIONS), name, result))
+
+        summary = run_bench(max(depth, 1), self.engine.search_algorithm, progress=progress)
+        for line in format_summary(summary):
+            self.send("info string " + line)
+
+    def cmd_quit(self, args):
+        return False
+
+
+def main():
+    UciProtocol().run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""Постоянный фоновый поток поиска для интерфейсов"""
+
+import queue
+import threading
+import time
+from collections import namedtuple
+
+import chess.polyglot
+
+
+SearchResult = namedtuple("SearchResult", ["generation", "move", "think_time", "error", "pv", "stats"])
+
+
+class EngineWorker:
+    """Один долгоживущий поток поиска с очередью запросов и номерами поколений
+
+    Каждый submit() и cancel() увеличивает номер поколения. Результаты
+    устаревших поколений отбрасываются, а идущий устаревший поиск
+    останавливается через PurePythonAI.stop(), поэтому отменённый ход никогда
+    не попадёт на другую позицию и не будет занимать процессор.
+
+    ponder() запускает поиск за соперника в позиции после ожидаемого ответа.
+    Если следующий submit() приходит именно в эту позицию, поиск не
+    перезапускается, а получает ponderhit() и продолжается с уже заполненной
+    таблицей транспозиций; иначе он останавливается как устаревший.
+    """
+
+    def __init__(self, engine, notify=None):
+        self.engine = engine
+        self.notify = notify
+        self.generation = 0
+        self._active_generation = None
+        self._ponder = None
+        self._held_result = None
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self._lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="engine-worker", daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self):
+        return self._active_generation is not None or not self._requests.empty()
+
+    @property
+    def pondering(self):
+        return self._ponder is not None
+
+    def submit(self, board_state, difficulty_level, **limits):
+        """Отменяет текущий поиск и ставит в очередь новый; возвращает номер поколения
+
+        Если идёт ponder-поиск именно этой позиции, он продолжается вместо
+        нового поиска (ограничения берутся из запроса ponder()).
+        """
+        with self._lock:
+            ponder = self._ponder
+            self._ponder = None
+            if ponder is not None:
+                ponder_generation, ponder_key, ponder_limits = ponder
+                if ponder_generation == self.generation and ponder_key == chess.polyglot.zobrist_hash(board_state):
+                    self.ponder_hits += 1
+                    held, self._held_result = self._held_result, None
+                    if held is not None:
+                        # Поиск закончился до хода соперника: результат ждал подтверждения
+                        self._publish(held)
+                    elif self._active_generation == ponder_generation:
+                        self.engine.ponderhit()
+                    else:
+                        # Поиск ещё в очереди: он начнётся как обычный
+                        ponder_limits.pop("ponder", None)
+                    return ponder_generation
+                self.ponder_misses += 1
+            self._cancel_locked()
+            generation = self.generation
+        self._requests.put((generation, board_state.copy(), difficulty_level, limits))
+        return generation
+
+    def ponder(self, board_state, ponder_move, difficulty_level, **limits):
+        """Начинает поиск за соперника в позиции после ожидаемого хода ponder_move
+
+        Результат не публикуется, пока submit() не подтвердит, что соперник
+        сыграл именно этот ход.
+        """
+        board = board_state.copy()
+        board.push(ponder_move)
+        limits = dict(limits, ponder=True)
+        with self._lock:
+            self._cancel_locked()
+            generation = self.generation
+            self._ponder = (generation, chess.polyglot.zobrist_hash(board), limits)
+        self._requests.put((generation, board, difficulty_level, limits))
+        return generation
+
+    def cancel(self):
+        """Делает все выданные запросы устаревшими и останавливает идущий поиск"""
+        with self._lock:
+            self._cancel_locked()
+
+    def _cancel_locked(self):
+        self.generation += 1
+        self._ponder = None
+        self._held_result = None
+        if self._active_generation is not None:
+            self.engine.stop()
+
+    def poll(self):
+        """Результат текущего поколения или None (вызывается из потока интерфейса)"""
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                return None
+            if result.generation == self.generation:
+                return result
+
+    def close(self):
+        self.cancel()
+        self._requests.put(None)
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            generation, board_state, difficulty_level, limits = request
+            with self._lock:
+                if generation != self.generation:
+                    continue
+                self._active_generation = generation
+                limits = dict(limits)
+
+            start_time = time.time()
+            move, error, pv, stats = None, None, [], None
+            try:
+                move = self.engine.get_best_move(board_state, difficulty_level, **limits)
+                pv = list(self.engine.pv)
+                stats = self.engine.stats
+            except Exception as e:
+                error = e
+            think_time = time.time() - start_time
+
+            with self._lock:
+                self._active_generation = None
+                # stop() мог прийти уже после завершения поиска
+                self.engine.stop_requested = False
+                result = SearchResult(generation, move, think_time, error, pv, stats)
+                if self._ponder is not None and self._ponder[0] == generation:
+                    # Ход за соперника публикуется только после submit() в эту позицию
+                    self._held_result = result
+                    result = None
+                elif generation != self.generation:
+                    result = None
+
+            if result is not None:
+                self._publish(result)
+
+    def _publish(self, result):
+        self._results.put(result)
+        if self.notify is not None:
+            self.notify()